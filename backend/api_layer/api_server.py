@@ -19,6 +19,7 @@ import os
 import traceback
 from logger import add_log, get_logs, get_job_logs
 from openai import OpenAI
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 
 # Global variable to store the socketio instance
 _global_socketio_instance = None
@@ -377,6 +378,11 @@ class ApiServer:
         def hello():
             return jsonify({'message': 'Insight Bot Running'})
         
+        @self.app.route('/metrics')
+        def metrics():
+            """Prometheus metrics (JobManager lock contention and hold time)"""
+            return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
+        
         @self.app.route('/system/status')
         def system_status():
             """Get system status and bootstrap information"""
@@ -540,7 +546,7 @@ class ApiServer:
                     return jsonify({'error': 'Job not found'}), 404
                 
                 job_user_info = job_info.get('user_info', {})
-                job_user_email = job_user_info.get('email', '').lower()
+                job_user_email = job_user_info.get('email_lower') or job_user_info.get('email', '').lower()
                 
                 if job_user_email != user_email:
                     return jsonify({'error': 'Access denied: You do not own this job'}), 403
@@ -1,4 +1,5 @@
 from flask import Blueprint, request, jsonify, current_app, g
+import io
 import os
 import json
 import re
@@ -109,6 +110,46 @@ def _normalize_filename_remove_timestamp(filename: str) -> str:
     name = name.rstrip(' -_') or 'file'
     return f"{name}{ext}"
 
+def _is_salesforce_data_blob(blob_name: str) -> bool:
+    """Salesforce exports are Parquet; older exports are pickles."""
+    return blob_name.lower().endswith(('.parquet', '.pkl'))
+
+
+def _widen_downcast_columns(df):
+    """Undo the Cloud Function's storage-only downcasting before the frame reaches the agents.
+
+    Categoricals reject new labels (fillna('Unknown') raises) and int8/int16 sums overflow
+    silently, so categories go back to object and every integer column to int64.
+    """
+    for column in df.select_dtypes('category').columns:
+        df[column] = df[column].astype(object)
+    for column in df.select_dtypes('integer').columns:
+        if df[column].dtype != 'int64':
+            df[column] = df[column].astype('int64')
+    return df
+
+
+def _download_salesforce_blob(blob, target_dir: str) -> str:
+    """Download one Salesforce export into target_dir as a pickle and return its local path.
+
+    The Cloud Function uploads compressed Parquet to keep transfers small, but the
+    analysis agents read pickles from the session input dir, so Parquet is converted on arrival.
+    """
+    original = os.path.basename(blob.name)
+    normalized = _normalize_filename_remove_timestamp(original)
+    name, ext = os.path.splitext(normalized)
+    if ext.lower() != '.parquet':
+        local_path = os.path.join(target_dir, normalized)
+        blob.download_to_filename(local_path)
+        return local_path
+
+    import pandas as pd
+    local_path = os.path.join(target_dir, f"{name}.pkl")
+    df = pd.read_parquet(io.BytesIO(blob.download_as_bytes()), engine='pyarrow')
+    _widen_downcast_columns(df).to_pickle(local_path)
+    return local_path
+
+
 @salesforce_bp.route('/salesforce/save_credentials', methods=['POST'])
 def save_salesforce_credentials():
     try:
@@ -219,10 +260,10 @@ def save_salesforce_credentials():
 
 
 def _download_pickle_files_from_firebase(user_email: str, target_dir: str) -> List[str]:
-    """Download all pickle files from Firebase Storage path <user_email>/data/salesforce into target_dir.
+    """Download all Salesforce exports from Firebase Storage path <user_email>/data/salesforce into target_dir as pickle files.
 
     Note: Using Firebase Admin Storage SDK listing would be ideal, but if not configured,
-    attempt HTTPS download for known .pkl files when an index is provided by a Cloud Function.
+    attempt HTTPS download for known .parquet/.pkl files when an index is provided by a Cloud Function.
     """
     os.makedirs(target_dir, exist_ok=True)
     saved_files: List[str] = []
@@ -242,12 +283,8 @@ def _download_pickle_files_from_firebase(user_email: str, target_dir: str) -> Li
             blobs = list(bucket.list_blobs(prefix=prefix))
             add_log(f"Salesforce import: listing via firebase_admin - bucket={bucket.name}, prefix={prefix}")
             for blob in blobs:
-                if blob.name.lower().endswith('.pkl'):
-                    original = os.path.basename(blob.name)
-                    normalized = _normalize_filename_remove_timestamp(original)
-                    local_path = os.path.join(target_dir, normalized)
-                    blob.download_to_filename(local_path)
-                    saved_files.append(local_path)
+                if _is_salesforce_data_blob(blob.name):
+                    saved_files.append(_download_salesforce_blob(blob, target_dir))
             if saved_files:
                 return saved_files
         except Exception as e:
@@ -299,13 +336,9 @@ def _download_pickle_files_from_firebase(user_email: str, target_dir: str) -> Li
                     blobs_iter = gcs_client.list_blobs(bucket_or_name=bucket_obj, prefix=prefix)
                     any_found = False
                     for blob in blobs_iter:
-                        if blob.name.lower().endswith('.pkl'):
+                        if _is_salesforce_data_blob(blob.name):
                             any_found = True
-                            original = os.path.basename(blob.name)
-                            normalized = _normalize_filename_remove_timestamp(original)
-                            local_path = os.path.join(target_dir, normalized)
-                            blob.download_to_filename(local_path)
-                            saved_files.append(local_path)
+                            saved_files.append(_download_salesforce_blob(blob, target_dir))
                     if any_found:
                         add_log(f"Salesforce import: downloaded {len(saved_files)} files from bucket {bucket_name}")
                         break
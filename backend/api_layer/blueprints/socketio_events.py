@@ -54,7 +54,7 @@ def register_socketio_events(socketio, job_manager, session_manager):
             job_info = job_manager.get_job(job_id)
             if job_info:
                 job_user_info = job_info.get('user_info', {})
-                job_user_email = job_user_info.get('email', '').lower()
+                job_user_email = job_user_info.get('email_lower') or job_user_info.get('email', '').lower()
                 job_session_id = job_info.get('session_id', '')
 
                 if job_user_email == user_email and job_session_id == session_id:
@@ -154,7 +154,7 @@ def register_socketio_events(socketio, job_manager, session_manager):
             job_info = job_manager.get_job(job_id)
             if job_info:
                 job_user_info = job_info.get('user_info', {})
-                job_user_email = job_user_info.get('email', '').lower()
+                job_user_email = job_user_info.get('email_lower') or job_user_info.get('email', '').lower()
                 job_session_id = job_info.get('session_id', '')
 
                 if job_user_email == user_email and job_session_id == session_id:
@@ -1,10 +1,22 @@
 import os
+import gzip
 import json
+import shutil
+import tempfile
 import logging
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime
 import firebase_admin
 from firebase_admin import credentials, firestore, storage
+from google.api_core.retry import Retry
+
+
+# Storage upload tuning
+UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024
+UPLOAD_RETRY = Retry(initial=0.25, maximum=5, multiplier=2, deadline=30)
+
+# Firestore caps a single batched write at 500 operations
+FIRESTORE_BATCH_LIMIT = 500
 
 
 class FirebaseConfig:
@@ -94,13 +106,13 @@ class FirebaseCRUD:
         Args:
             collection_name: Name of the Firestore collection
             document_id: Document ID (use None for auto-generated ID)
-            data: Data to store
+            data: Data to store; a created_at already in it is kept, otherwise the write time is used
             
         Returns:
             bool: True if successful, False otherwise
         """
         try:
-            data['created_at'] = datetime.utcnow()
+            data['created_at'] = data.get('created_at') or datetime.utcnow()
             data['updated_at'] = datetime.utcnow()
             
             if document_id:
@@ -118,6 +130,35 @@ class FirebaseCRUD:
             self.logger.error(f"❌ Failed to create document in {collection_name}: {str(e)}")
             return False
     
+    def batch_create(self, documents: List[Tuple[str, str, Dict[str, Any]]]) -> List[bool]:
+        """
+        Create several documents with atomic batched writes
+        
+        Args:
+            documents: List of (collection_name, document_id, data) tuples, one per document;
+                created_at is kept when data already has one, as in create
+            
+        Returns:
+            List[bool]: Whether each document was written, in the order given
+        """
+        written = [False] * len(documents)
+        # A WriteBatch commits all of its writes or none, and raises when it fails
+        for start in range(0, len(documents), FIRESTORE_BATCH_LIMIT):
+            chunk = documents[start:start + FIRESTORE_BATCH_LIMIT]
+            try:
+                batch = self.db.batch()
+                for collection_name, document_id, data in chunk:
+                    data['created_at'] = data.get('created_at') or datetime.utcnow()
+                    data['updated_at'] = datetime.utcnow()
+                    batch.set(self.db.collection(collection_name).document(document_id), data)
+                batch.commit()
+                written[start:start + len(chunk)] = [True] * len(chunk)
+                self.logger.info(f"✅ Created {len(chunk)} documents in one batch")
+            except Exception as e:
+                self.logger.error(f"❌ Failed to batch create {len(chunk)} documents: {str(e)}")
+        
+        return written
+    
     def read(self, collection_name: str, document_id: str) -> Optional[Dict[str, Any]]:
         """
         Read a document by ID
@@ -259,28 +300,36 @@ class FirebaseCRUD:
             self.logger.error(f"❌ Failed to query {collection_name}: {str(e)}")
             return []
     
-    def upload_file_to_storage(self, local_file_path: str, storage_path: str) -> Optional[str]:
+    def upload_file_to_storage(self, local_file_path: str, storage_path: str,
+                               stat_result: Optional[os.stat_result] = None) -> Optional[str]:
         """
         Upload file to Firebase Storage and return public URL
         
         Args:
             local_file_path: Path to the local file to upload
             storage_path: Path in Firebase Storage (e.g., 'sessionId/jobId/analysis_report.html')
+            stat_result: os.stat of the local file if the caller already has it
             
         Returns:
             str: Public accessible URL or None if failed
         """
         try:
-            if not os.path.exists(local_file_path):
+            if stat_result is None and not os.path.exists(local_file_path):
                 self.logger.error(f"❌ Local file not found: {local_file_path}")
                 return None
             
             # Get the blob reference
             blob = self.bucket.blob(storage_path)
             
-            # Upload the file
-            with open(local_file_path, 'rb') as file_data:
-                blob.upload_from_file(file_data, content_type='text/html')
+            # Upload the file gzip-encoded; Storage serves it with Content-Encoding so browsers decompress it
+            with open(local_file_path, 'rb') as file_data, tempfile.TemporaryFile() as compressed:
+                with gzip.GzipFile(fileobj=compressed, mode='wb') as gz:
+                    shutil.copyfileobj(file_data, gz)
+                compressed.seek(0)
+                blob.content_encoding = 'gzip'
+                # Resumable upload in 5 MiB chunks so a failure only resends the last chunk
+                blob.chunk_size = UPLOAD_CHUNK_SIZE
+                blob.upload_from_file(compressed, content_type='text/html', timeout=60, retry=UPLOAD_RETRY)
             
             # Make the blob public
             blob.make_public()
@@ -1,7 +1,8 @@
 from dataclasses import dataclass, asdict
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Set, Tuple
 from datetime import datetime
 from .firebase_config import get_firebase_crud
+from .user_cache import invalidate_user
 import uuid
 
 
@@ -201,6 +202,7 @@ class FirebaseDataManager:
         try:
             user_data = user.to_dict()
             success = self.crud.create(self.users_collection, user.email, user_data)
+            invalidate_user(user.email)
             
             if success:
                 print(f"👤 Created user: {user.email}")
@@ -246,6 +248,7 @@ class FirebaseDataManager:
         """
         try:
             success = self.crud.update(self.users_collection, user_email, update_data)
+            invalidate_user(user_email)
             
             if success:
                 print(f"📝 Updated user: {user_email}")
@@ -268,6 +271,7 @@ class FirebaseDataManager:
         """
         try:
             success = self.crud.delete(self.users_collection, user_email)
+            invalidate_user(user_email)
             
             if success:
                 print(f"🗑️ Deleted user: {user_email}")
@@ -342,6 +346,38 @@ class FirebaseDataManager:
             print(f"❌ Failed to create job {job.job_id}: {str(e)}")
             return False
     
+    def create_jobs_batch(self, jobs: List[Tuple[str, str, JobDocument]]) -> Set[Tuple[str, str, str]]:
+        """
+        Create several job documents with batched writes
+        
+        Args:
+            jobs: List of (user_email, session_id, JobDocument) tuples
+            
+        Returns:
+            Set[Tuple[str, str, str]]: (user_email, session_id, job_id) of every job that was written
+        """
+        # Firestore rejects several writes to the same document in one batch, keep the latest
+        unique_jobs = {}
+        for user_email, session_id, job in jobs:
+            unique_jobs[(user_email, session_id, job.job_id)] = job
+        
+        documents = [
+            (f"{self.users_collection}/{user_email}/{session_id}", job_id, job.to_dict())
+            for (user_email, session_id, job_id), job in unique_jobs.items()
+        ]
+        results = self.crud.batch_create(documents)
+        
+        written = set()
+        for key, ok in zip(unique_jobs, results):
+            if not ok:
+                continue
+            written.add(key)
+            # Only increment report count for successful jobs that were actually stored
+            if unique_jobs[key].job_status == "success":
+                self.increment_user_report_count(key[0])
+        
+        return written
+    
     def get_job(self, user_email: str, session_id: str, job_id: str) -> Optional[JobDocument]:
         """
         Get specific job by ID
@@ -7,6 +7,7 @@ import os
 import firebase_admin
 from firebase_admin import credentials, firestore
 from typing import List, Dict, Any, Optional
+from .user_cache import MISSING, AUTH_CACHE_MAX_AGE_SECONDS, get_cached_user, set_cached_user, invalidate_user, clear_user_cache
 
 
 class FirebaseUserManager:
@@ -80,6 +81,7 @@ class FirebaseUserManager:
             }
             
             self.db.collection(self.collection_name).document(email).set(user_doc)
+            invalidate_user(email)
             print(f"✅ User {email} added to authorized users in Firestore")
             return True
             
@@ -88,17 +90,11 @@ class FirebaseUserManager:
             return False
     
     def is_user_authorized(self, email: str) -> bool:
-        """Check if user email is in authorized users"""
+        """Check if user email is in authorized users (prefer get_user_by_email when the document is needed too)"""
         try:
-            if not self.db:
-                return False
-            
-            email = email.lower().strip()
-            doc_ref = self.db.collection(self.collection_name).document(email)
-            doc = doc_ref.get()
-            
-            if doc.exists:
-                user_data = doc.to_dict()
+            # Shares the cached document read with get_user_by_email, but only trusts a fresh entry
+            user_data = self.get_user_by_email(email, max_age=AUTH_CACHE_MAX_AGE_SECONDS)
+            if user_data:
                 return user_data.get('status', 'active') == 'active'
             
             return False
@@ -132,13 +128,18 @@ class FirebaseUserManager:
             print(f"Failed to get all users: {str(e)}")
             return []
     
-    def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
-        """Get user data by email"""
+    def get_user_by_email(self, email: str, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Get user data by email (cached for a short TTL, invalidated on writes; max_age re-reads older entries)"""
         try:
             if not self.db:
                 return None
             
             email = email.lower().strip()
+            cached = get_cached_user(email, max_age)
+            if cached is not MISSING:
+                # Callers may mutate the result, so never hand out the cached dict itself
+                return dict(cached) if cached else None
+            
             doc_ref = self.db.collection(self.collection_name).document(email)
             doc = doc_ref.get()
             
@@ -150,8 +151,10 @@ class FirebaseUserManager:
                     user_data['created_at'] = user_data['created_at'].isoformat()
                 if 'updated_at' in user_data and user_data['updated_at']:
                     user_data['updated_at'] = user_data['updated_at'].isoformat()
-                return user_data
+                set_cached_user(email, user_data)
+                return dict(user_data)
             
+            set_cached_user(email, None)
             return None
             
         except Exception as e:
@@ -169,6 +172,7 @@ class FirebaseUserManager:
             
             doc_ref = self.db.collection(self.collection_name).document(email)
             doc_ref.update(updates)
+            invalidate_user(email)
             
             print(f"User {email} updated successfully in Firestore")
             return True
@@ -186,6 +190,7 @@ class FirebaseUserManager:
             email = email.lower().strip()
             doc_ref = self.db.collection(self.collection_name).document(email)
             doc_ref.delete()
+            invalidate_user(email)
             
             print(f"User {email} deleted successfully from Firestore")
             return True
@@ -197,7 +202,8 @@ class FirebaseUserManager:
     def get_user_role(self, email: str) -> str:
         """Get user role (default: 'user')"""
         try:
-            user_data = self.get_user_by_email(email)
+            # Roles gate admin routes, so only trust a fresh cache entry
+            user_data = self.get_user_by_email(email, max_age=AUTH_CACHE_MAX_AGE_SECONDS)
             if user_data:
                 return user_data.get('role', 'user')
             return 'user'
@@ -226,6 +232,7 @@ class FirebaseUserManager:
             # Delete each document
             for doc in docs:
                 doc.reference.delete()
+            clear_user_cache()
             
             print("All users cleared from authorized users collection")
             return True
@@ -1,16 +1,74 @@
 import uuid
+import atexit
+import heapq
 import time
 import threading
 import json
 import os
+import shutil
+import sys
+from collections import defaultdict, namedtuple
+import queue
+import logging
+from logging.handlers import QueueHandler, QueueListener
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 import requests
 import docker
-from typing import Dict, Any, Optional, Tuple
+from prometheus_client import Counter, Histogram
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, Optional, Set, Tuple
 from enum import Enum
-from datetime import datetime
+from datetime import datetime, timezone
 from logger import add_log, add_job_log
 from .firebase_data_models import JobDocument, get_data_manager
 
+log = logging.getLogger("job_manager")
+_log_listener: Optional[QueueListener] = None
+
+# Records waiting for the log listener; when a stalled handler lets this fill up,
+# QueueHandler drops new records (reported through handleError) instead of growing memory
+LOG_QUEUE_MAX_SIZE = 10000
+
+# Report uploads and Firestore saves run here so job threads never block on them;
+# pending saves are flushed at interpreter exit
+_firestore_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="fs-save")
+atexit.register(_firestore_executor.shutdown, wait=True)
+
+# Pricing for GPT-4o-mini (example pricing - adjust as needed), folded to per-token rates
+_INPUT_COST_PER_TOKEN = 0.00015 / 1000  # $0.00015 per 1K input tokens
+_OUTPUT_COST_PER_TOKEN = 0.0006 / 1000  # $0.0006 per 1K output tokens
+
+# Lock contention metrics for JobManager.lock
+LOCK_CONTENTION = Counter("job_manager_lock_contention_total",
+                          "JobManager lock acquisitions that had to wait")
+LOCK_HOLD_MICROSECONDS = Histogram("job_manager_lock_hold_microseconds",
+                                   "Time JobManager lock was held, in microseconds",
+                                   buckets=(10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000, 500000))
+
+
+class InstrumentedLock:
+    """threading.Lock wrapper that records contention and hold time"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._acquired_at = 0.0
+    
+    def __enter__(self):
+        if not self._lock.acquire(blocking=False):
+            LOCK_CONTENTION.inc()
+            self._lock.acquire()
+        self._acquired_at = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        held = time.perf_counter() - self._acquired_at
+        self._lock.release()
+        LOCK_HOLD_MICROSECONDS.observe(held * 1_000_000)
+        return False
+
+# Snapshot of a user's token balance taken once per job
+UserTokenInfo = namedtuple("UserTokenInfo", "used_token issued_token remaining_token")
+
 class JobStatus(Enum):
     PENDING = "pending"
     RUNNING = "running" 
@@ -22,23 +80,65 @@ class JobManager:
     """Manages asynchronous analysis jobs"""
     
     def __init__(self):
-        self.jobs: Dict[str, Dict[str, Any]] = {}
-        self.lock = threading.Lock()
+        # Jobs are striped across shards by job_id, each with its own lock, so updates to
+        # unrelated jobs never serialize. Reads rely on the GIL making single dict operations atomic.
+        self._n_shards = 16
+        self._shards: List[Dict[str, Dict[str, Any]]] = [{} for _ in range(self._n_shards)]
+        self._shard_locks = [InstrumentedLock() for _ in range(self._n_shards)]
+        
+        # Cross-shard indexes, guarded by self.lock
+        self.jobs_by_email: Dict[str, Set[str]] = defaultdict(set)  # lower(email) -> job_ids
+        self._age_heap: List[Tuple[float, str]] = []  # (created_at, job_id) min-heap for cleanup_old_jobs
+        self.lock = InstrumentedLock()
+        
         self.jobs_file = "jobs.json"
+        self._file_lock = threading.Lock()
+        # jobs.json is rewritten by a writer thread, so no job or shard lock is held across the dump
+        self._save_requested = threading.Event()
+        threading.Thread(target=self._jobs_file_writer, name="jobs-file-writer", daemon=True).start()
+        atexit.register(self._flush_jobs_file)
         
         # Base directories for job data
         self.base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
         self.input_base_dir = os.path.join(self.base_dir, 'execution_layer', 'input_data')
         self.output_base_dir = os.path.join(self.base_dir, 'execution_layer', 'output_data')
         
+        # Session directories already ensured by create_job
+        self._dirs_created: Set[str] = set()
+        self._dirs_lock = threading.Lock()
+        
+        # Report existence cache for get_job_report_path
+        self._report_ready: Set[str] = set()
+        self._report_miss_ts: Dict[str, float] = {}
+        self._report_lock = threading.Lock()
+        
         # Firebase data manager
         self.data_manager = get_data_manager()
         
+        # Shared pool for post-job I/O (container logs, Firestore saves)
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="job-io")
+        
+        # Job documents are written to Firestore in bulk by a single flusher thread
+        self._firestore_batch: queue.Queue = queue.Queue()
+        threading.Thread(target=self._firestore_flusher, name="firestore-flusher", daemon=True).start()
+        
+        # Job threads only enqueue log records; a single listener thread formats and writes them
+        global _log_listener
+        if _log_listener is None:
+            log_queue = queue.Queue(maxsize=LOG_QUEUE_MAX_SIZE)
+            log.addHandler(QueueHandler(log_queue))
+            log.setLevel(logging.INFO)
+            log.propagate = False
+            stream_handler = logging.StreamHandler(sys.stdout)
+            stream_handler.setFormatter(logging.Formatter("[%(asctime)s] %(message)s", "%Y-%m-%d %H:%M:%S"))
+            _log_listener = QueueListener(log_queue, stream_handler)
+            _log_listener.start()
+        
         # Docker client for container logs
         try:
             self.docker_client = docker.from_env()
         except Exception as e:
-            print(f"⚠️ [DOCKER] Failed to initialize Docker client: {str(e)}")
+            log.warning("⚠️ [DOCKER] Failed to initialize Docker client: %s", e)
             self.docker_client = None
     
     def save_container_logs(self, job_id: str, container_id: str) -> str:
@@ -54,18 +154,18 @@ class JobManager:
         """
         try:
             if not self.docker_client:
-                print(f"❌ [DOCKER LOGS] Docker client not available")
+                log.error("❌ [DOCKER LOGS] Docker client not available")
                 return None
                 
             # Get job info to find output directory
-            job_info = self.get_job(job_id)
+            job_info = self.get_job_view(job_id)
             if not job_info:
-                print(f"❌ [DOCKER LOGS] Job {job_id} not found")
+                log.error("❌ [DOCKER LOGS] Job %s not found", job_id)
                 return None
                 
             output_dir = job_info.get('output_dir')
             if not output_dir:
-                print(f"❌ [DOCKER LOGS] No output directory found for job {job_id}")
+                log.error("❌ [DOCKER LOGS] No output directory found for job %s", job_id)
                 return None
             
             # Save logs in the same directory as analysis_report.html
@@ -79,11 +179,11 @@ class JobManager:
                 logs = container.logs(stdout=True, stderr=True, timestamps=True)
                 f.write(logs.decode("utf-8"))
                 
-            print(f"📄 [DOCKER LOGS] Saved container logs to: {log_file}")
+            log.info("📄 [DOCKER LOGS] Saved container logs to: %s", log_file)
             return log_file
             
         except Exception as e:
-            print(f"❌ [DOCKER LOGS] Failed to save container logs: {str(e)}")
+            log.error("❌ [DOCKER LOGS] Failed to save container logs: %s", e)
             return None
         
     def _load_jobs_from_file(self):
@@ -95,41 +195,105 @@ class JobManager:
                 
                 # Restore jobs
                 for job_id, job_data in stored_jobs.items():
-                    self.jobs[job_id] = job_data
+                    self._shard(job_id)[1][job_id] = job_data
+                    self._index_job(job_id, job_data)
+                    heapq.heappush(self._age_heap, (job_data.get('created_at', 0), job_id))
                     add_log(f"Restored job {job_id} from file")
                         
             except Exception as e:
                 add_log(f"Error loading jobs from file: {str(e)}")
-                self.jobs = {}
+                self._shards = [{} for _ in range(self._n_shards)]
     
     def _save_jobs_to_file(self):
         """Save current jobs to JSON file"""
         try:
-            # Convert jobs to JSON-serializable format
-            jobs_to_save = {}
-            for job_id, job_info in self.jobs.items():
-                jobs_to_save[job_id] = {
-                    'job_id': job_info['job_id'],
-                    'session_id': job_info['session_id'],
-                    'status': job_info['status'].value if isinstance(job_info['status'], JobStatus) else job_info['status'],
-                    'query': job_info['query'],
-                    'model': job_info['model'],
-                    'created_at': job_info['created_at'],
-                    'started_at': job_info.get('started_at'),
-                    'completed_at': job_info.get('completed_at'),
-                    'error': job_info.get('error'),
-                    'container_port': job_info.get('container_port'),
-                    'output_dir': job_info.get('output_dir'),
-                    'input_dir': job_info.get('input_dir'),
-                    'user_info': job_info.get('user_info', {})
-                }
-            
-            with open(self.jobs_file, 'w') as f:
-                json.dump(jobs_to_save, f, indent=2)
+            # Snapshot and write under one lock so a later snapshot can never be overwritten by an older one
+            with self._file_lock:
+                # Convert jobs to JSON-serializable format
+                jobs_to_save = {}
+                for job_id, job_info in self._all_jobs():
+                    jobs_to_save[job_id] = {
+                        'job_id': job_info['job_id'],
+                        'session_id': job_info['session_id'],
+                        'status': job_info['status'].value if isinstance(job_info['status'], JobStatus) else job_info['status'],
+                        'query': job_info['query'],
+                        'model': job_info['model'],
+                        'created_at': job_info['created_at'],
+                        'started_at': job_info.get('started_at'),
+                        'completed_at': job_info.get('completed_at'),
+                        'error': job_info.get('error'),
+                        'container_port': job_info.get('container_port'),
+                        'output_dir': job_info.get('output_dir'),
+                        'input_dir': job_info.get('input_dir'),
+                        'user_info': job_info.get('user_info', {})
+                    }
+                
+                with open(self.jobs_file, 'w') as f:
+                    json.dump(jobs_to_save, f, indent=2)
                 
         except Exception as e:
             add_log(f"Error saving jobs to file: {str(e)}")
     
+    def _schedule_save(self):
+        """Mark jobs.json dirty; the writer thread folds any number of requests into one write"""
+        self._save_requested.set()
+    
+    def _jobs_file_writer(self):
+        """Rewrite jobs.json whenever a save has been requested"""
+        while True:
+            self._save_requested.wait()
+            self._save_requested.clear()
+            self._save_jobs_to_file()
+    
+    def _flush_jobs_file(self):
+        """Write a still pending save at interpreter exit"""
+        if self._save_requested.is_set():
+            self._save_requested.clear()
+            self._save_jobs_to_file()
+    
+    def _shard(self, job_id: str) -> Tuple[InstrumentedLock, Dict[str, Dict[str, Any]]]:
+        """Return the lock and dict of the shard holding job_id"""
+        i = hash(job_id) % self._n_shards
+        return self._shard_locks[i], self._shards[i]
+    
+    def _all_jobs(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Snapshot (job_id, job_info) pairs across all shards"""
+        return [item for shard in self._shards for item in list(shard.items())]
+    
+    def _email_key(self, job_info: Dict[str, Any]) -> Optional[str]:
+        """Return the lowercased owner email of a job, if any"""
+        user_info = job_info.get('user_info') or {}
+        email_lower = user_info.get('email_lower')
+        if email_lower is None and user_info.get('email'):
+            # Jobs persisted before email_lower existed
+            email_lower = user_info['email'].strip().lower()
+        return email_lower
+    
+    def _index_job(self, job_id: str, job_info: Dict[str, Any]):
+        """Add a job to the email index (caller holds self.lock)"""
+        email_lower = self._email_key(job_info)
+        if email_lower:
+            self.jobs_by_email[email_lower].add(job_id)
+    
+    def _unindex_job(self, job_id: str, job_info: Dict[str, Any]):
+        """Remove a job from the email index (caller holds self.lock)"""
+        email_lower = self._email_key(job_info)
+        if email_lower:
+            job_ids = self.jobs_by_email.get(email_lower)
+            if job_ids is not None:
+                job_ids.discard(job_id)
+                if not job_ids:
+                    del self.jobs_by_email[email_lower]
+    
+    def _ensure_dir(self, path: str):
+        """Create a directory once, skipping the makedirs syscalls for directories already created"""
+        with self._dirs_lock:
+            if path in self._dirs_created:
+                return
+        os.makedirs(path, exist_ok=True)
+        with self._dirs_lock:
+            self._dirs_created.add(path)
+    
     def create_job(self, session_id: str, query: str, model: str = "gpt-4.1-mini", 
                    session_info: Optional[Dict[str, Any]] = None,
                    user_info: Optional[Dict[str, Any]] = None) -> Tuple[str, Dict[str, Any]]:
@@ -137,78 +301,99 @@ class JobManager:
         # Generate job ID with JOB prefix for better identification  
         job_id = f"JOB_{str(uuid.uuid4())}"
         
-        with self.lock:
-            try:
-                # add_job_log(job_id, f"Creating new job: {job_id} for session: {session_id}")
-                
-                # CORRECTED: Keep original session-based design for HOST
-                # Input: Session-based (shared across jobs in session)
-                # Output: Session-based on HOST, job-based INSIDE container
-                
-                session_input_dir = os.path.join(self.input_base_dir, session_id)
-                session_output_dir = os.path.join(self.output_base_dir, session_id)
-                
-                print(f"🔧 [JOB MANAGER] Setting up job {job_id} (session: {session_id})")
-                print(f"📥 Session input dir (host): {session_input_dir}")
-                print(f"📤 Session output dir (host): {session_output_dir}")
-                print(f"💡 Container will create job subdir: /app/execution_layer/output_data/{job_id}/")
-                
-                # Ensure session input directory exists (for shared session data)
-                if session_id:
-                    os.makedirs(session_input_dir, exist_ok=True)
-                    print(f"✅ Session input directory ensured: {session_input_dir}")
-                
-                # Ensure session output directory exists (container mount point)
-                os.makedirs(session_output_dir, exist_ok=True)
-                print(f"✅ Session output directory ensured: {session_output_dir}")
-                
-                # Job-specific paths for reference (used by container)
-                job_input_dir = session_input_dir  # Jobs share session input
-                job_output_dir = os.path.join(session_output_dir, job_id)  # Job subdir in session output
-                
-                # Store job information
-                job_info = {
-                    'job_id': job_id,
-                    'session_id': session_id,
-                    'status': JobStatus.PENDING,
-                    'query': query,
-                    'model': model,
-                    'created_at': time.time(),
-                    'started_at': None,
-                    'completed_at': None,
-                    'error': None,
-                    'container_port': session_info.get('container_port') if session_info else None,
-                    'output_dir': job_output_dir,
-                    'input_dir': job_input_dir,
-                    'user_info': user_info or {}  # Store user information for job ownership
-                }
-                
-                self.jobs[job_id] = job_info
-                self._save_jobs_to_file()
-                
-                # add_job_log(job_id, f"Job {job_id} created successfully")
-                return job_id, job_info
-                
-            except Exception as e:
-                # add_job_log(job_id, f"Error creating job {job_id}: {str(e)}")
-                raise
+        try:
+            # add_job_log(job_id, f"Creating new job: {job_id} for session: {session_id}")
+            
+            # CORRECTED: Keep original session-based design for HOST
+            # Input: Session-based (shared across jobs in session)
+            # Output: Session-based on HOST, job-based INSIDE container
+            
+            session_input_dir = os.path.join(self.input_base_dir, session_id)
+            session_output_dir = os.path.join(self.output_base_dir, session_id)
+            
+            log.info("🔧 [JOB MANAGER] Setting up job %s (session: %s)", job_id, session_id)
+            log.debug("📥 Session input dir (host): %s", session_input_dir)
+            log.debug("📤 Session output dir (host): %s", session_output_dir)
+            log.debug("💡 Container will create job subdir: /app/execution_layer/output_data/%s/", job_id)
+            
+            # Ensure session input directory exists (for shared session data); never cached,
+            # since cleaning up an old job of this session deletes it off-thread
+            if session_id:
+                os.makedirs(session_input_dir, exist_ok=True)
+                log.debug("✅ Session input directory ensured: %s", session_input_dir)
+            
+            # Ensure session output directory exists (container mount point)
+            self._ensure_dir(session_output_dir)
+            log.debug("✅ Session output directory ensured: %s", session_output_dir)
+            
+            # Job-specific paths for reference (used by container)
+            job_input_dir = session_input_dir  # Jobs share session input
+            job_output_dir = os.path.join(session_output_dir, job_id)  # Job subdir in session output
+            
+            # Normalize the owner email once so lookups never lowercase per comparison
+            job_user_info = dict(user_info or {})
+            if job_user_info.get('email'):
+                job_user_info['email_lower'] = job_user_info['email'].strip().lower()
+            
+            # Store job information (created_at_dt is the same instant as a datetime for Firestore)
+            created_at = time.time()
+            job_info = {
+                'job_id': job_id,
+                'session_id': session_id,
+                'status': JobStatus.PENDING,
+                'query': query,
+                'model': model,
+                'created_at': created_at,
+                'created_at_dt': datetime.fromtimestamp(created_at, timezone.utc),
+                'started_at': None,
+                'completed_at': None,
+                'error': None,
+                'container_port': session_info.get('container_port') if session_info else None,
+                'output_dir': job_output_dir,
+                'report_path': os.path.join(job_output_dir, 'analysis_report.html'),
+                'input_dir': job_input_dir,
+                'user_info': job_user_info  # Store user information for job ownership
+            }
+            
+            # Only the index updates need the global lock; directories and jobs.json are handled outside it
+            with self.lock:
+                shard_lock, shard = self._shard(job_id)
+                with shard_lock:
+                    shard[job_id] = job_info
+                self._index_job(job_id, job_info)
+                heapq.heappush(self._age_heap, (job_info['created_at'], job_id))
+            self._schedule_save()
+            
+            # add_job_log(job_id, f"Job {job_id} created successfully")
+            return job_id, job_info
+            
+        except Exception as e:
+            # add_job_log(job_id, f"Error creating job {job_id}: {str(e)}")
+            raise
     
     def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
         """Get job information by ID"""
-        with self.lock:
-            job_info = self.jobs.get(job_id)
-            if job_info:
-                # Ensure status is properly typed
-                if isinstance(job_info['status'], str):
-                    job_info['status'] = JobStatus(job_info['status'])
-                return job_info.copy()
+        # Single-key dict reads and dict.copy() are atomic under the GIL, no lock needed
+        job_info = self._shard(job_id)[1].get(job_id)
+        if not job_info:
             return None
+        job_copy = job_info.copy()
+        # Ensure status is properly typed
+        if isinstance(job_copy['status'], str):
+            job_copy['status'] = JobStatus(job_copy['status'])
+        return job_copy
+    
+    def get_job_view(self, job_id: str) -> Optional[Mapping[str, Any]]:
+        """Get a read-only view of job information by ID (no copy, reflects later updates)"""
+        job_info = self._shard(job_id)[1].get(job_id)
+        return MappingProxyType(job_info) if job_info else None
     
     def update_job_status(self, job_id: str, status: JobStatus, 
-                         error: Optional[str] = None) -> bool:
-        """Update job status"""
-        with self.lock:
-            job_info = self.jobs.get(job_id)
+                         error: Optional[str] = None, persist: bool = True) -> bool:
+        """Update job status (persist=False keeps the change in memory only)"""
+        shard_lock, shard = self._shard(job_id)
+        with shard_lock:
+            job_info = shard.get(job_id)
             if not job_info:
                 return False
             
@@ -222,21 +407,86 @@ class JobManager:
                 
             if error:
                 job_info['error'] = error
+        
+        # Written by the jobs.json writer thread, after the shard lock is released
+        if persist:
+            self._schedule_save()
+        # add_job_log(job_id, f"Job {job_id} status updated: {old_status} -> {status}")
+        return True
+    
+    def _firestore_flusher(self):
+        """Drain queued job documents and write them to Firestore in bulk"""
+        while True:
+            items = [self._firestore_batch.get()]
+            deadline = time.time() + 0.5
+            while len(items) < 400:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self._firestore_batch.get(timeout=remaining))
+                except queue.Empty:
+                    break
             
-            self._save_jobs_to_file()
-            # add_job_log(job_id, f"Job {job_id} status updated: {old_status} -> {status}")
-            return True
+            try:
+                written = self.data_manager.create_jobs_batch([item[:3] for item in items])
+                log.info("🔥 [FIRESTORE] %d job(s) saved to Firestore", len(written))
+                if len(written) < len({(item[0], item[1], item[2].job_id) for item in items}):
+                    log.error("❌ [FIRESTORE ERROR] Failed to save some of %d job(s) to database", len(items))
+            except Exception as firestore_error:
+                log.error("❌ [FIRESTORE ERROR] Failed to save jobs to database: %s", firestore_error)
+                written = set()
+            # Tell each waiting save whether its own document made it
+            for user_email, session_id, job_document, outcome in items:
+                outcome.set_result((user_email, session_id, job_document.job_id) in written)
+    
+    def _handle_job_failure(self, job_id: str, session_info: Optional[Dict[str, Any]], error_msg: str,
+                            metrics: Optional[Dict[str, Any]] = None, status_error: Optional[str] = None,
+                            job_info: Optional[Mapping[str, Any]] = None):
+        """Save container logs and the failed result, then mark the job as failed
+        
+        Args:
+            job_id: Job identifier
+            session_info: Session container info, may be None if the failure happened before lookup
+            error_msg: Error stored with the failed result in Firestore
+            metrics: Execution metrics reported by the container, if any
+            status_error: Error stored on the job status, defaults to error_msg
+            job_info: Job information the caller already holds, looked up when omitted
+        """
+        # Save Docker container logs for failed job (if possible)
+        try:
+            container_id = session_info.get('container_id') if session_info else None
+            if container_id:
+                self.save_container_logs(job_id, container_id)
+        except Exception as log_error:
+            log.error("❌ [DOCKER LOGS] Error saving container logs: %s", log_error)
+        
+        # Queue failed job for the bulk Firestore writer
+        try:
+            failed_result = {
+                'status': 'error',
+                'error': error_msg,
+                'metrics': metrics or {},
+                'costs': {'total_cost': 0, 'total_tokens': 0}
+            }
+            self.save_job_to_firestore_async(job_id, failed_result, job_info=job_info)
+        except Exception as firestore_error:
+            log.error("❌ [FIRESTORE ERROR] Failed to save failed job to database: %s", firestore_error)
+        
+        self.update_job_status(job_id, JobStatus.FAILED, status_error or error_msg)
     
     def start_job_execution(self, job_id: str, session_manager) -> bool:
         """Start asynchronous job execution"""
-        job_info = self.get_job(job_id)
+        job_info = self.get_job_view(job_id)
         if not job_info:
             return False
         
         def execute_job():
+            session_info = None
             try:
                 # add_job_log(job_id, f"Starting job execution: {job_id}")
-                self.update_job_status(job_id, JobStatus.RUNNING)
+                # RUNNING is short-lived, only creation and terminal states are persisted
+                self.update_job_status(job_id, JobStatus.RUNNING, persist=False)
                 
                 # Get session info for container communication
                 session_id = job_info['session_id']
@@ -265,18 +515,15 @@ class JobManager:
                     user_email = user_info.get('email', '')
                     
                     # Get current user token info ONCE at the start
-                    user_token_info = {}
+                    user_token_info: Optional[UserTokenInfo] = None
                     if user_email and self.data_manager:
                         user = self.data_manager.get_user(user_email)
                         if user:
-                            user_token_info = {
-                                'used_token': user.used_token,
-                                'issued_token': user.issued_token,
-                                'remaining_token': user.issued_token - user.used_token
-                            }
-                            print(f"📊 [JOB_MANAGER] User tokens: {user.used_token}/{user.issued_token} (remaining: {user_token_info['remaining_token']})")
+                            user_token_info = UserTokenInfo(user.used_token, user.issued_token,
+                                                            user.issued_token - user.used_token)
+                            log.info("📊 [JOB_MANAGER] User tokens: %s/%s (remaining: %s)", *user_token_info)
                         else:
-                            print(f"⚠️ [JOB_MANAGER] User '{user_email}' not found in database")
+                            log.warning("⚠️ [JOB_MANAGER] User '%s' not found in database", user_email)
                     
                     # Send job execution request with user token info for internal tracking
                     container_response = session_req.post(
@@ -289,15 +536,15 @@ class JobManager:
                             'input_dir': job_info['input_dir'],
                             'output_dir': job_info['output_dir'],
                             'user_email': user_email,
-                            'user_token_info': user_token_info  # Pass current token info for internal tracking
+                            'user_token_info': user_token_info._asdict() if user_token_info else {}  # Pass current token info for internal tracking
                         },
                         timeout=3600  # 1 hour timeout for analysis
                     )
                     
                     if container_response.status_code == 200:
                         result = container_response.json()
-                        print("Job completed successfully")
-                        print(f"Result: {result}")
+                        log.info("Job %s completed successfully", job_id)
+                        log.debug("Result: %s", result)
                         
                         # Determine job status to decide on token update
                         execution_status = result.get('status', 'success')
@@ -316,204 +563,89 @@ class JobManager:
                             total_tokens_used = metrics.get('total_tokens', 0)
                             
                             if total_tokens_used > 0:
-                                print(f"📊 [TOKEN UPDATE] Job used {total_tokens_used:,} tokens for user {user_email}")
+                                log.info("📊 [TOKEN UPDATE] Job used %d tokens for user %s", total_tokens_used, user_email)
                                 
                                 # Check if user would exceed limit
-                                current_used = user_token_info.get('used_token', 0)
-                                issued_tokens = user_token_info.get('issued_token', 0)
+                                current_used = user_token_info.used_token
+                                issued_tokens = user_token_info.issued_token
                                 new_total = current_used + total_tokens_used
                                 
                                 if new_total > issued_tokens:
-                                    print(f"⚠️ [TOKEN WARNING] Job would exceed token limit! {new_total} > {issued_tokens}")
+                                    log.warning("⚠️ [TOKEN WARNING] Job would exceed token limit! %d > %d", new_total, issued_tokens)
                                     # Note: Job already completed, but warn about limit
                                 
                                 # Update user's token count in database
                                 try:
                                     update_success = self.data_manager.update_user_tokens(user_email, total_tokens_used)
                                     if update_success:
-                                        print(f"✅ [TOKEN UPDATE] Updated user {user_email}: +{total_tokens_used:,} tokens (Total: {new_total:,}/{issued_tokens:,})")
+                                        log.info("✅ [TOKEN UPDATE] Updated user %s: +%d tokens (Total: %d/%d)", user_email, total_tokens_used, new_total, issued_tokens)
                                     else:
-                                        print(f"❌ [TOKEN UPDATE] Failed to update tokens for user {user_email}")
+                                        log.error("❌ [TOKEN UPDATE] Failed to update tokens for user %s", user_email)
                                 except Exception as token_error:
-                                    print(f"❌ [TOKEN UPDATE] Error updating tokens: {str(token_error)}")
+                                    log.error("❌ [TOKEN UPDATE] Error updating tokens: %s", token_error)
                             else:
-                                print(f"📊 [TOKEN UPDATE] No tokens consumed for job {job_id}")
+                                log.info("📊 [TOKEN UPDATE] No tokens consumed for job %s", job_id)
                         
-                        # Save Docker container logs to output directory
-                        try:
-                            container_id = session_info.get('container_id')
-                            if container_id:
-                                self.save_container_logs(job_id, container_id)
-                            else:
-                                print(f"⚠️ [DOCKER LOGS] No container ID found for session {session_id}")
-                        except Exception as log_error:
-                            print(f"❌ [DOCKER LOGS] Error saving container logs: {str(log_error)}")
+                        # Container logs and the Firestore save are independent I/O, run them concurrently
+                        container_id = session_info.get('container_id')
+                        if not container_id:
+                            log.warning("⚠️ [DOCKER LOGS] No container ID found for session %s", session_id)
+                        logs_future = self._executor.submit(self.save_container_logs, job_id, container_id) if container_id else None
+                        firestore_future = self.save_job_to_firestore_async(job_id, result, job_info=job_info)
+                        wait([f for f in (logs_future, firestore_future) if f], timeout=30)
                         
-                        # Save job output to Firestore
-                        try:
-                            firestore_success = self.save_job_to_firestore(job_id, result)
-                            if firestore_success:
-                                print(f"📊 [PROGRESS] 🔥 Analysis Complete - Results saved to database")
-                            else:
-                                print(f"⚠️ [PROGRESS] 🔥 Analysis Complete - Database save failed but analysis succeeded")
-                        except Exception as firestore_error:
-                            print(f"❌ [FIRESTORE ERROR] Failed to save to database: {str(firestore_error)}")
+                        if logs_future and logs_future.done() and logs_future.exception():
+                            log.error("❌ [DOCKER LOGS] Error saving container logs: %s", logs_future.exception())
+                        
+                        if not firestore_future.done():
+                            log.warning("⚠️ [PROGRESS] 🔥 Analysis Complete - Database save still in progress")
+                        elif firestore_future.exception():
+                            firestore_error = firestore_future.exception()
+                            log.error("❌ [FIRESTORE ERROR] Failed to save to database: %s", firestore_error)
                             add_log(f"Firestore save error for job {job_id}: {str(firestore_error)}")
+                        elif firestore_future.result():
+                            log.info("📊 [PROGRESS] 🔥 Analysis Complete - Results saved to database")
+                        else:
+                            log.warning("⚠️ [PROGRESS] 🔥 Analysis Complete - Database save failed but analysis succeeded")
                         
                         # add_job_log(job_id, f"Job {job_id} completed successfully")
                         self.update_job_status(job_id, JobStatus.COMPLETED)
                     elif container_response.status_code == 402:
                         # Token limit exceeded - handle gracefully
-                        
-                        # Save Docker container logs for failed job
-                        try:
-                            container_id = session_info.get('container_id')
-                            if container_id:
-                                self.save_container_logs(job_id, container_id)
-                        except Exception as log_error:
-                            print(f"❌ [DOCKER LOGS] Error saving container logs: {str(log_error)}")
-                        
                         try:
                             error_data = container_response.json()
                             error_msg = error_data.get('error', 'Token limit exceeded')
-                            print(f"🚫 [TOKEN LIMIT] Job {job_id} stopped: {error_msg}")
-                            
-                            # Save failed job to Firestore 
-                            try:
-                                failed_result = {
-                                    'status': 'error',
-                                    'error': error_msg,
-                                    'metrics': error_data.get('metrics', {}),
-                                    'costs': {'total_cost': 0, 'total_tokens': 0}
-                                }
-                                firestore_success = self.save_job_to_firestore(job_id, failed_result)
-                                if firestore_success:
-                                    print(f"📊 [FAILED JOB] Failed job {job_id} saved to Firestore")
-                            except Exception as firestore_error:
-                                print(f"❌ [FIRESTORE ERROR] Failed to save failed job to database: {str(firestore_error)}")
-                            
-                            self.update_job_status(job_id, JobStatus.FAILED, f"TOKEN_LIMIT_EXCEEDED: {error_msg}")
-                        except:
+                            log.warning("🚫 [TOKEN LIMIT] Job %s stopped: %s", job_id, error_msg)
+                            self._handle_job_failure(job_id, session_info, error_msg,
+                                                     metrics=error_data.get('metrics', {}),
+                                                     status_error=f"TOKEN_LIMIT_EXCEEDED: {error_msg}",
+                                                     job_info=job_info)
+                        except ValueError:
                             error_msg = f"Token limit exceeded (HTTP 402): {container_response.text}"
-                            print(f"🚫 [TOKEN LIMIT] Job {job_id} failed: {error_msg}")
-                            
-                            # Save failed job to Firestore 
-                            try:
-                                failed_result = {
-                                    'status': 'error',
-                                    'error': error_msg,
-                                    'metrics': {},
-                                    'costs': {'total_cost': 0, 'total_tokens': 0}
-                                }
-                                self.save_job_to_firestore(job_id, failed_result)
-                            except Exception as firestore_error:
-                                print(f"❌ [FIRESTORE ERROR] Failed to save failed job to database: {str(firestore_error)}")
-                            
-                            self.update_job_status(job_id, JobStatus.FAILED, error_msg)
+                            log.warning("🚫 [TOKEN LIMIT] Job %s failed: %s", job_id, error_msg)
+                            self._handle_job_failure(job_id, session_info, error_msg, job_info=job_info)
                     else:
                         # Other HTTP errors (400, 500, etc.)
-                        
-                        # Save Docker container logs for failed job
-                        try:
-                            container_id = session_info.get('container_id')
-                            if container_id:
-                                self.save_container_logs(job_id, container_id)
-                        except Exception as log_error:
-                            print(f"❌ [DOCKER LOGS] Error saving container logs: {str(log_error)}")
-                        
                         try:
                             error_data = container_response.json()
                             error_msg = f"Analysis failed: {error_data.get('error', container_response.text)}"
                             error_type = error_data.get('error_type', 'unknown_error')
-                            print(f"❌ [JOB FAILED] {error_type}: {error_msg}")
-                            
-                            # Save failed job to Firestore 
-                            try:
-                                failed_result = {
-                                    'status': 'error',
-                                    'error': error_msg,
-                                    'metrics': error_data.get('metrics', {}),
-                                    'costs': {'total_cost': 0, 'total_tokens': 0}
-                                }
-                                firestore_success = self.save_job_to_firestore(job_id, failed_result)
-                                if firestore_success:
-                                    print(f"📊 [FAILED JOB] Failed job {job_id} saved to Firestore")
-                            except Exception as firestore_error:
-                                print(f"❌ [FIRESTORE ERROR] Failed to save failed job to database: {str(firestore_error)}")
-                                
-                        except:
+                            log.error("❌ [JOB FAILED] %s: %s", error_type, error_msg)
+                            metrics = error_data.get('metrics', {})
+                        except ValueError:
                             error_msg = f"Container API returned error: {container_response.status_code} - {container_response.text}"
-                            
-                            # Save failed job to Firestore 
-                            try:
-                                failed_result = {
-                                    'status': 'error',
-                                    'error': error_msg,
-                                    'metrics': {},
-                                    'costs': {'total_cost': 0, 'total_tokens': 0}
-                                }
-                                self.save_job_to_firestore(job_id, failed_result)
-                            except Exception as firestore_error:
-                                print(f"❌ [FIRESTORE ERROR] Failed to save failed job to database: {str(firestore_error)}")
+                            metrics = None
                         
-                        # add_job_log(job_id, f"Job {job_id} failed: {error_msg}")
-                        self.update_job_status(job_id, JobStatus.FAILED, error_msg)
+                        self._handle_job_failure(job_id, session_info, error_msg, metrics=metrics, job_info=job_info)
                         
                 except requests.RequestException as e:
-                    error_msg = f"Error communicating with container API: {str(e)}"
-                    
-                    # Save Docker container logs for failed job (if possible)
-                    try:
-                        container_id = session_info.get('container_id')
-                        if container_id:
-                            self.save_container_logs(job_id, container_id)
-                    except Exception as log_error:
-                        print(f"❌ [DOCKER LOGS] Error saving container logs: {str(log_error)}")
-                    
-                    # Save failed job to Firestore 
-                    try:
-                        failed_result = {
-                            'status': 'error',
-                            'error': error_msg,
-                            'metrics': {},
-                            'costs': {'total_cost': 0, 'total_tokens': 0}
-                        }
-                        firestore_success = self.save_job_to_firestore(job_id, failed_result)
-                        if firestore_success:
-                            print(f"📊 [FAILED JOB] Failed job {job_id} saved to Firestore")
-                    except Exception as firestore_error:
-                        print(f"❌ [FIRESTORE ERROR] Failed to save failed job to database: {str(firestore_error)}")
-                    
-                    # add_job_log(job_id, f"Job {job_id} failed: {error_msg}")
-                    self.update_job_status(job_id, JobStatus.FAILED, error_msg)
+                    self._handle_job_failure(job_id, session_info,
+                                             f"Error communicating with container API: {str(e)}",
+                                             job_info=job_info)
                     
             except Exception as e:
-                error_msg = f"Job execution failed: {str(e)}"
-                
-                # Save Docker container logs for failed job (if possible)
-                try:
-                    container_id = session_info.get('container_id')
-                    if container_id:
-                        self.save_container_logs(job_id, container_id)
-                except Exception as log_error:
-                    print(f"❌ [DOCKER LOGS] Error saving container logs: {str(log_error)}")
-                
-                # Save failed job to Firestore 
-                try:
-                    failed_result = {
-                        'status': 'error',
-                        'error': error_msg,
-                        'metrics': {},
-                        'costs': {'total_cost': 0, 'total_tokens': 0}
-                    }
-                    firestore_success = self.save_job_to_firestore(job_id, failed_result)
-                    if firestore_success:
-                        print(f"📊 [FAILED JOB] Failed job {job_id} saved to Firestore")
-                except Exception as firestore_error:
-                    print(f"❌ [FIRESTORE ERROR] Failed to save failed job to database: {str(firestore_error)}")
-                
-                # add_job_log(job_id, f"Job {job_id} failed: {error_msg}")
-                self.update_job_status(job_id, JobStatus.FAILED, error_msg)
+                self._handle_job_failure(job_id, session_info, f"Job execution failed: {str(e)}",
+                                         job_info=job_info)
         
         # Start job execution in background thread
         job_thread = threading.Thread(target=execute_job, daemon=True)
@@ -521,21 +653,37 @@ class JobManager:
         
         return True
     
+    def _report_path(self, job_info: Mapping[str, Any]) -> str:
+        """Return the analysis report path of a job"""
+        # Jobs restored from jobs.json predate the precomputed report_path
+        return job_info.get('report_path') or os.path.join(job_info.get('output_dir', ''), 'analysis_report.html')
+    
     def get_job_report_path(self, job_id: str) -> Optional[str]:
         """Get the path to the job's analysis report"""
-        job_info = self.get_job(job_id)
+        job_info = self.get_job_view(job_id)
         if not job_info or job_info['status'] != JobStatus.COMPLETED:
             return None
             
-        output_dir = job_info.get('output_dir')
-        if not output_dir:
+        if not job_info.get('output_dir'):
             return None
             
-        report_path = os.path.join(output_dir, 'analysis_report.html')
-        if os.path.exists(report_path):
-            return report_path
-            
-        return None
+        report_path = self._report_path(job_info)
+        
+        # A report never disappears once written; misses are rechecked at most once per second
+        with self._report_lock:
+            if job_id in self._report_ready:
+                return report_path
+            if time.time() - self._report_miss_ts.get(job_id, 0) < 1.0:
+                return None
+        
+        exists = os.path.exists(report_path)
+        with self._report_lock:
+            if exists:
+                self._report_ready.add(job_id)
+                self._report_miss_ts.pop(job_id, None)
+            else:
+                self._report_miss_ts[job_id] = time.time()
+        return report_path if exists else None
     
     def cleanup_old_jobs(self, max_age_hours: int = 24):
         """Clean up jobs older than max_age_hours"""
@@ -543,64 +691,62 @@ class JobManager:
         max_age_seconds = max_age_hours * 3600
         
         with self.lock:
-            jobs_to_cleanup = []
-            for job_id, job_info in self.jobs.items():
-                if current_time - job_info['created_at'] > max_age_seconds:
-                    jobs_to_cleanup.append(job_id)
-            
-            for job_id in jobs_to_cleanup:
-                add_log(f"Cleaning up old job: {job_id}")
-                self._cleanup_job(job_id)
-    
-    def _cleanup_job(self, job_id: str):
-        """Clean up a specific job and its associated files"""
-        job_info = self.jobs.get(job_id)
-        if job_info:
-            try:
-                # Remove job directories
-                import shutil
-                
-                input_dir = job_info.get('input_dir')
-                if input_dir and os.path.exists(input_dir):
-                    shutil.rmtree(input_dir)
-                    
-                output_dir = job_info.get('output_dir')  
-                if output_dir and os.path.exists(output_dir):
-                    shutil.rmtree(output_dir)
-                
-                # Remove from jobs dict
-                del self.jobs[job_id]
-                self._save_jobs_to_file()
-                
-                add_log(f"Job {job_id} cleaned up successfully")
-                
-            except Exception as e:
-                add_log(f"Error cleaning up job {job_id}: {str(e)}")
+            # Oldest jobs sit at the top of the heap, stop at the first one still within max age
+            cutoff = current_time - max_age_seconds
+            dirs_to_remove = []
+            while self._age_heap and self._age_heap[0][0] < cutoff:
+                _, job_id = heapq.heappop(self._age_heap)
+                if job_id in self._shard(job_id)[1]:
+                    add_log(f"Cleaning up old job: {job_id}")
+                    dirs_to_remove.extend(self._cleanup_job(job_id))
+        if dirs_to_remove:
+            self._schedule_save()
+        
+        # Disk cleanup happens outside the lock so status polls are not blocked on rmtree
+        for path in dirs_to_remove:
+            self._executor.submit(self._rmtree_safely, path)
+    
+    def _cleanup_job(self, job_id: str) -> List[str]:
+        """Remove a job from memory (caller holds self.lock) and return its directories to delete"""
+        shard_lock, shard = self._shard(job_id)
+        with shard_lock:
+            job_info = shard.pop(job_id, None)
+        if not job_info:
+            return []
+        self._unindex_job(job_id, job_info)
+        
+        input_dir = job_info.get('input_dir')
+        output_dir = job_info.get('output_dir')
+        with self._report_lock:
+            self._report_ready.discard(job_id)
+            self._report_miss_ts.pop(job_id, None)
+        
+        add_log(f"Job {job_id} cleaned up successfully")
+        return [d for d in (input_dir, output_dir) if d]
+    
+    def _rmtree_safely(self, path: str):
+        """Delete a job directory, ignoring errors"""
+        shutil.rmtree(path, ignore_errors=True)
+    
+    def _job_summary(self, job_info: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy a job dict with its status as a plain string value"""
+        status = job_info['status']
+        return {**job_info, 'status': status.value if isinstance(status, JobStatus) else status}
     
     def get_jobs_by_session(self, session_id: str) -> list:
         """Get all jobs for a specific session"""
-        with self.lock:
-            session_jobs = []
-            for job_id, job_info in self.jobs.items():
-                if job_info.get('session_id') == session_id:
-                    job_copy = job_info.copy()
-                    if isinstance(job_copy['status'], JobStatus):
-                        job_copy['status'] = job_copy['status'].value
-                    session_jobs.append(job_copy)
-            return session_jobs
+        return [self._job_summary(job_info) for _, job_info in self._all_jobs()
+                if job_info.get('session_id') == session_id]
     
     def get_jobs_by_user(self, user_email: str) -> list:
         """Get all jobs for a specific user"""
-        with self.lock:
-            user_jobs = []
-            for job_id, job_info in self.jobs.items():
-                job_user_info = job_info.get('user_info', {})
-                if job_user_info.get('email', '').lower() == user_email.lower():
-                    job_copy = job_info.copy()
-                    if isinstance(job_copy['status'], JobStatus):
-                        job_copy['status'] = job_copy['status'].value
-                    user_jobs.append(job_copy)
-            return user_jobs
+        job_ids = list(self.jobs_by_email.get(user_email.strip().lower(), ()))
+        user_jobs = []
+        for job_id in job_ids:
+            job_info = self._shard(job_id)[1].get(job_id)
+            if job_info:
+                user_jobs.append(self._job_summary(job_info))
+        return user_jobs
     
     def _extract_user_email_from_job(self, job_info: Dict[str, Any]) -> Optional[str]:
         """Extract user email from job info for Firestore path"""
@@ -609,145 +755,172 @@ class JobManager:
     
     def _calculate_total_cost(self, metrics: Dict[str, Any]) -> float:
         """Calculate total cost based on token usage"""
-        # Pricing for GPT-4o-mini (example pricing - adjust as needed)
-        input_cost_per_1k = 0.00015  # $0.00015 per 1K input tokens
-        output_cost_per_1k = 0.0006  # $0.0006 per 1K output tokens
+        return round(metrics.get('prompt_tokens', 0) * _INPUT_COST_PER_TOKEN
+                     + metrics.get('completion_tokens', 0) * _OUTPUT_COST_PER_TOKEN, 6)
+    
+    def _build_job_document(self, job_id: str, execution_response: Dict[str, Any], lines: List[str],
+                            job_info: Optional[Mapping[str, Any]] = None) -> Optional[Tuple[str, str, JobDocument, Optional[Tuple[str, str]]]]:
+        """
+        Build the Firestore JobDocument for a finished job, with an empty report_url
         
-        input_tokens = metrics.get('prompt_tokens', 0)
-        output_tokens = metrics.get('completion_tokens', 0)
+        Args:
+            job_id: Job identifier
+            execution_response: Response from container execution containing metrics, costs, etc.
+            lines: Log lines for this save, emitted together by save_job_to_firestore
+            job_info: Job information the caller already holds, looked up when omitted
+            
+        Returns:
+            Tuple of (user_email, session_id, JobDocument, report_upload), or None if the job cannot be saved.
+            report_upload is (report_path, storage_path, stat_result) when the report should be uploaded
+        """
+        if job_info is None:
+            job_info = self.get_job_view(job_id)
+        if not job_info:
+            lines.append(f"❌ Job {job_id} not found for Firestore save")
+            return None
+        
+        # Extract user email for Firestore path
+        user_email = self._extract_user_email_from_job(job_info)
+        if not user_email:
+            lines.append(f"❌ No user email found for job {job_id}, cannot save to Firestore")
+            return None
         
-        input_cost = (input_tokens / 1000) * input_cost_per_1k
-        output_cost = (output_tokens / 1000) * output_cost_per_1k
+        session_id = job_info['session_id']
         
-        return round(input_cost + output_cost, 6)
+        # Extract metrics from execution response
+        metrics = execution_response.get('metrics', {})
+        costs = execution_response.get('costs', {})
+        
+        # Determine job status based on execution response
+        execution_status = execution_response.get('status', 'success')
+        has_error = execution_response.get('error') is not None
+        
+        # Check for token exhaustion indicators (from graceful completion)
+        analysis_completed_early = execution_response.get('analysis_completed_early', False)
+        completion_reason = execution_response.get('completion_reason', '')
+        token_limit_reached = completion_reason == 'token_limit_reached'
+        
+        # Job is failed if: execution failed OR has error OR token limit was reached
+        job_status = "failed" if (execution_status == 'error' or has_error or token_limit_reached) else "success"
+        
+        lines.append(f"📊 Job {job_id} status={job_status} (execution_status={execution_status}, "
+                     f"has_error={has_error}, token_limit_reached={token_limit_reached})")
+        
+        # Upload analysis report to Firebase Storage ONLY for successful jobs
+        report_path = self._report_path(job_info)
+        
+        # Firebase Storage path: sessionId/jobId/analysis_report.html
+        storage_path = f"{session_id}/{job_id}/analysis_report.html"
+        
+        # The upload itself runs alongside the Firestore write, report_url is patched in afterwards
+        # One stat both checks existence and is reused by the uploader
+        report_upload = None
+        report_stat = None
+        if job_status == "success":
+            try:
+                report_stat = os.stat(report_path)
+            except FileNotFoundError:
+                pass
+        if report_stat is not None:
+            report_upload = (report_path, storage_path, report_stat)
+        elif job_status == "failed":
+            if token_limit_reached:
+                lines.append(f"Skipped Firebase Storage upload for token-exhausted job {job_id} - partial reports not stored in GCP")
+            else:
+                lines.append(f"Skipped Firebase Storage upload for failed job {job_id} - error reports not stored in GCP")
+        else:
+            lines.append(f"Warning: Analysis report not found for job {job_id} - JobDocument will have empty report_url")
+        
+        logs_url = f"/logs/{session_id}/{job_id}/"
+        
+        # Create JobDocument according to the data model
+        job_document = JobDocument(
+            job_id=job_id,
+            created_at=job_info.get('created_at_dt') or datetime.fromtimestamp(job_info['created_at'], timezone.utc),
+            logs_url=logs_url,
+            report_url="",
+            total_token_used=metrics.get('total_tokens', 0),
+            total_cost=costs.get('total_cost', 0),
+            question=job_info['query'],
+            job_status=job_status
+        )
+        
+        return user_email, session_id, job_document, report_upload
     
-    def save_job_to_firestore(self, job_id: str, execution_response: Dict[str, Any]) -> bool:
+    def _upload_report(self, job_id: str, lines: List[str], report_path: str, storage_path: str,
+                       report_stat: Optional[os.stat_result] = None) -> str:
+        """Upload a job report to Firebase Storage and return its URL, or an empty string on failure"""
+        report_url = ""
+        try:
+            firebase_storage_url = self.data_manager.crud.upload_file_to_storage(report_path, storage_path,
+                                                                                 stat_result=report_stat)
+            if firebase_storage_url:
+                report_url = firebase_storage_url  # Use Firebase Storage URL ONLY
+                lines.append(f"✅ Report uploaded to Firebase Storage for job {job_id}: {report_url}")
+            else:
+                lines.append(f"❌ Failed to upload report to Firebase Storage for job {job_id} - JobDocument will have empty report_url")
+        except Exception as upload_error:
+            lines.append(f"Storage upload error for job {job_id}: {str(upload_error)}")
+        
+        # Final validation: Ensure report_url is either empty or a valid Firebase Storage URL
+        if report_url and not report_url.startswith('https://storage.googleapis.com/'):
+            lines.append(f"Validation: Non-Firebase Storage URL detected for job {job_id}, converting to empty string")
+            report_url = ""
+        
+        log.debug("✅ [VALIDATION] Final report_url for JobDocument: '%s' (Firebase Storage URL or empty)", report_url)
+        return report_url
+    
+    def save_job_to_firestore(self, job_id: str, execution_response: Dict[str, Any],
+                              job_info: Optional[Mapping[str, Any]] = None) -> bool:
         """
         Save job output to Firestore according to the data model [[memory:6942292]]
         
+        The document is queued and written in bulk by the flusher thread.
+        
         Args:
             job_id: Job identifier
             execution_response: Response from container execution containing metrics, costs, etc.
+            job_info: Job information the caller already holds, looked up when omitted
             
         Returns:
-            bool: True if successful, False otherwise
+            bool: True if the flusher wrote the job document, False otherwise
         """
+        # Everything logged during one save goes out as a single add_log entry
+        lines: List[str] = []
         try:
-            job_info = self.get_job(job_id)
-            if not job_info:
-                add_log(f"❌ Job {job_id} not found for Firestore save")
+            prepared = self._build_job_document(job_id, execution_response, lines, job_info)
+            if not prepared:
                 return False
+            user_email, session_id, job_document, report_upload = prepared
             
-            # Extract user email for Firestore path
-            user_email = self._extract_user_email_from_job(job_info)
-            if not user_email:
-                add_log(f"❌ No user email found for job {job_id}, cannot save to Firestore")
-                return False
-            
-            session_id = job_info['session_id']
-            
-            # Extract metrics from execution response
-            metrics = execution_response.get('metrics', {})
-            costs = execution_response.get('costs', {})
+            # Start the report upload, then queue the document without its URL so both go out together
+            upload_future = self._executor.submit(self._upload_report, job_id, lines, *report_upload) if report_upload else None
+            written = Future()
+            self._firestore_batch.put((user_email, session_id, job_document, written))
+            lines.append(f"✅ Job {job_id} queued for Firestore save")
             
-            # Determine job status based on execution response
-            execution_status = execution_response.get('status', 'success')
-            has_error = execution_response.get('error') is not None
-            
-            # Check for token exhaustion indicators (from graceful completion)
-            analysis_completed_early = execution_response.get('analysis_completed_early', False)
-            completion_reason = execution_response.get('completion_reason', '')
-            token_limit_reached = completion_reason == 'token_limit_reached'
-            
-            # Job is failed if: execution failed OR has error OR token limit was reached
-            job_status = "failed" if (execution_status == 'error' or has_error or token_limit_reached) else "success"
-            
-            print(f"📊 [JOB_STATUS] Job {job_id} status: {job_status}")
-            print(f"📊 [JOB_STATUS] Factors: execution_status={execution_status}, has_error={has_error}, token_limit_reached={token_limit_reached}")
-            
-            # Upload analysis report to Firebase Storage ONLY for successful jobs
-            output_dir = job_info.get('output_dir', '')
-            report_path = os.path.join(output_dir, 'analysis_report.html')
-            
-            # Firebase Storage path: sessionId/jobId/analysis_report.html
-            storage_path = f"{session_id}/{job_id}/analysis_report.html"
-            
-            # Upload file and get Firebase Storage URL - SKIP ERROR REPORTS
-            report_url = ""
-            if job_status == "success" and os.path.exists(report_path):
-                try:
-                    firebase_storage_url = self.data_manager.crud.upload_file_to_storage(report_path, storage_path)
-                    if firebase_storage_url:
-                        report_url = firebase_storage_url  # Use Firebase Storage URL ONLY
-                        print(f"📤 [PROGRESS] 🔗 Report uploaded to Firebase Storage: {report_url}")
-                        add_log(f"✅ Report uploaded to Firebase Storage for job {job_id}: {report_url}")
-                    else:
-                        print(f"❌ [PROGRESS] 🔗 Failed to upload report to Firebase Storage - Empty URL will be saved")
-                        add_log(f"❌ Failed to upload report to Firebase Storage for job {job_id} - JobDocument will have empty report_url")
-                        # Use empty string instead of local path - ensures ONLY Firebase Storage URLs or empty
-                        report_url = ""
-                except Exception as upload_error:
-                    print(f"❌ [STORAGE ERROR] Failed to upload report: {str(upload_error)}")
-                    add_log(f"Storage upload error for job {job_id}: {str(upload_error)}")
-                    # Use empty string instead of local path - ensures ONLY Firebase Storage URLs or empty
-                    report_url = ""
-            elif job_status == "failed":
-                if token_limit_reached:
-                    print(f"🚫 [TOKEN EXHAUSTED] Not uploading partial report to Firebase Storage for token-exhausted job {job_id}")
-                    add_log(f"Skipped Firebase Storage upload for token-exhausted job {job_id} - partial reports not stored in GCP")
-                else:
-                    print(f"🚫 [SKIPPED] Not uploading error report to Firebase Storage for failed job {job_id}")
-                    add_log(f"Skipped Firebase Storage upload for failed job {job_id} - error reports not stored in GCP")
-                report_url = ""
-            else:
-                print(f"⚠️ [WARNING] Analysis report not found at: {report_path}")
-                add_log(f"Warning: Analysis report not found for job {job_id} - JobDocument will have empty report_url")
-                # Use empty string instead of local path - ensures ONLY Firebase Storage URLs or empty
-                report_url = ""
-            
-            logs_url = f"/logs/{session_id}/{job_id}/"
-            
-            # Final validation: Ensure report_url is either empty or a valid Firebase Storage URL
-            if report_url and not report_url.startswith('https://storage.googleapis.com/'):
-                print(f"⚠️ [VALIDATION WARNING] Report URL is not a Firebase Storage URL: {report_url}")
-                print(f"🔒 [VALIDATION] Converting to empty string to ensure Firebase Storage URLs only")
-                add_log(f"Validation: Non-Firebase Storage URL detected for job {job_id}, converting to empty string")
-                report_url = ""
-            
-            print(f"✅ [VALIDATION] Final report_url for JobDocument: '{report_url}' (Firebase Storage URL or empty)")
-            
-            # Create JobDocument according to the data model
-            job_document = JobDocument(
-                job_id=job_id,
-                created_at=datetime.fromtimestamp(job_info['created_at']),
-                logs_url=logs_url,
-                report_url=report_url,
-                total_token_used=metrics.get('total_tokens', 0),
-                total_cost=costs.get('total_cost', 0),
-                question=job_info['query'],
-                job_status=job_status
-            )
-            
-            # Save to Firestore using the data manager
-            success = self.data_manager.create_job(user_email, session_id, job_document)
-            
-            if success:
-                if token_limit_reached:
-                    add_log(f"⚠️ Token-exhausted job {job_id} saved to Firestore with status 'failed'")
-                    print(f"🔥 [FIRESTORE] Token-exhausted job {job_id} saved as FAILED for user {user_email} in session {session_id}")
-                else:
-                    add_log(f"✅ Job {job_id} saved to Firestore successfully")
-                    print(f"🔥 [FIRESTORE] Job {job_id} saved for user {user_email} in session {session_id}")
-            else:
-                add_log(f"❌ Failed to save job {job_id} to Firestore")
-            
-            return success
+            report_url = upload_future.result() if upload_future else None
+            if not written.result(timeout=60):
+                lines.append(f"❌ Job {job_id} was not written to Firestore")
+                return False
+            # Patch the URL in only once the flusher has created the document
+            if report_url and not self.data_manager.update_job(user_email, session_id, job_id, {'report_url': report_url}):
+                lines.append(f"❌ Failed to save report_url for job {job_id} to Firestore")
+                return False
+            return True
             
         except Exception as e:
             error_msg = f"Error saving job {job_id} to Firestore: {str(e)}"
-            add_log(f"❌ {error_msg}")
-            print(f"❌ [FIRESTORE ERROR] {error_msg}")
+            lines.append(f"❌ {error_msg}")
             return False
+        finally:
+            if lines:
+                add_log("\n".join(lines))
+
+    def save_job_to_firestore_async(self, job_id: str, execution_response: Dict[str, Any],
+                                    job_info: Optional[Mapping[str, Any]] = None) -> Future:
+        """Run save_job_to_firestore on the Firestore executor and return its future"""
+        return _firestore_executor.submit(self.save_job_to_firestore, job_id, execution_response, job_info)
 
 # Global job manager instance
 job_manager = JobManager()
@@ -1,17 +1,92 @@
 import requests
 import os
+import asyncio
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Shared session so token refreshes reuse pooled TLS connections to Google
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=32,
+    max_retries=Retry(total=2, backoff_factor=0.1, status_forcelist=[502, 503, 504],
+                      allowed_methods=frozenset({"POST"}))
+))
+
+# Issued tokens per sha256(refresh_token) -> (response json, expiry time), LRU ordered
+_TOKEN_CACHE: "OrderedDict[str, tuple]" = OrderedDict()
+_TOKEN_CACHE_LOCK = threading.Lock()
+_TOKEN_CACHE_MAX_SIZE = 1024
+_EXPIRY_MARGIN_SECONDS = 60
+
+# Refreshes currently in progress per cache key
+_INFLIGHT: Dict[str, Future] = {}
+
+def _cache_key(refresh_token: str) -> str:
+    """Hash the refresh token so the raw secret is not kept as a cache key"""
+    return hashlib.sha256(refresh_token.encode("utf-8")).hexdigest()
 
 def refresh_google_token(refresh_token: str):
-    """Exchange refresh token for new access and ID tokens"""
+    """Exchange refresh token for new access and ID tokens, reusing tokens that are not near expiry
+    
+    Every caller gets its own copy of the response, callers add fields (e.g. role) to it.
+    """
+    key = _cache_key(refresh_token)
+    with _TOKEN_CACHE_LOCK:
+        cached = _TOKEN_CACHE.get(key)
+        if cached and cached[1] - time.time() > _EXPIRY_MARGIN_SECONDS:
+            _TOKEN_CACHE.move_to_end(key)
+            return dict(cached[0])
+        
+        # Concurrent refreshes of the same token wait on the first caller's request
+        inflight = _INFLIGHT.get(key)
+        if inflight is None:
+            inflight = _INFLIGHT[key] = Future()
+            is_leader = True
+        else:
+            is_leader = False
+    
+    if not is_leader:
+        tokens = inflight.result()
+        return dict(tokens) if tokens else tokens
+    
+    tokens = None
+    try:
+        tokens = _request_google_token(refresh_token)
+        if tokens and tokens.get("expires_in"):
+            with _TOKEN_CACHE_LOCK:
+                _TOKEN_CACHE[key] = (tokens, time.time() + tokens["expires_in"])
+                _TOKEN_CACHE.move_to_end(key)
+                while len(_TOKEN_CACHE) > _TOKEN_CACHE_MAX_SIZE:
+                    _TOKEN_CACHE.popitem(last=False)
+    finally:
+        with _TOKEN_CACHE_LOCK:
+            _INFLIGHT.pop(key, None)
+        inflight.set_result(tokens)
+    return dict(tokens) if tokens else tokens
+
+async def refresh_google_token_async(refresh_token: str):
+    """Async variant of refresh_google_token that keeps the event loop free during the request"""
+    return await asyncio.to_thread(refresh_google_token, refresh_token)
+
+def _request_google_token(refresh_token: str):
+    """Call Google's token endpoint"""
     try:
-        resp = requests.post(
+        resp = _SESSION.post(
             "https://oauth2.googleapis.com/token",
             data={
                 "refresh_token": refresh_token,
                 "client_id": os.getenv("GOOGLE_CLIENT_ID"),
                 "client_secret": os.getenv("GOOGLE_CLIENT_SECRET"),
                 "grant_type": "refresh_token"
-            }
+            },
+            timeout=(3, 7)
         )
         if resp.status_code != 200:
             return None
@@ -3,69 +3,518 @@
 
 import docker
 from docker.errors import NotFound
+import atexit
+import fcntl
+import heapq
+import queue
 import uuid
 import time
 import threading
 import os
 import json
 import shutil
-from typing import Dict, Optional, Tuple, Any, cast, List
+import socket
+from collections import defaultdict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Set, Tuple, Any, cast, List
 
 from logger import add_log, get_logs, clear_logs
 
+try:
+    import orjson
+    
+    def _json_dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+    
+    _json_loads = orjson.loads
+except ImportError:
+    # Fall back to the stdlib encoder when orjson is not installed
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+    
+    _json_loads = json.loads
+
+# Host directories mounted into session containers
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))  # Points to backend/
+INPUT_DATA_BASE = os.path.join(BASE_DIR, 'execution_layer', 'input_data')
+OUTPUT_DATA_BASE = os.path.join(BASE_DIR, 'execution_layer', 'output_data')
+WARM_SLOTS_BASE = os.path.join(BASE_DIR, 'execution_layer', 'warm_slots')
+
+# Directories renamed with this marker are deleted by the janitor thread
+TRASH_MARKER = '.trash.'
+
+# Keep-alive connections to the Docker daemon shared by exec/reload/start/stop calls
+DOCKER_POOL_SIZE = 64
+
+# User-defined bridge shared by all session containers; inter-container traffic stays disabled
+SESSION_NETWORK = os.getenv("SESSION_NETWORK", "sessions-net")
+
+# Idle containers kept running so create_session can check one out instead of booting a new one
+WARM_POOL_SIZE = int(os.getenv("SESSION_WARM_POOL_SIZE", "2"))
+WARM_POOL_MAX_FAILURES = 3
+
+# sessions.log is folded into sessions.json after this many records or this many seconds
+JOURNAL_COMPACT_RECORDS = 50
+JOURNAL_COMPACT_INTERVAL = 60
+
+# Per-session trace messages from directory scans are only emitted when this is set
+SESSION_MANAGER_VERBOSE = os.getenv("SESSION_MANAGER_VERBOSE", "").lower() in ("1", "true", "yes")
+
+# Container inspect results younger than this are reused instead of calling the daemon again
+RELOAD_TTL_SECONDS = 1.0
+
+# Kernel-assigned ports to try before giving up on a collision with a reserved one
+PORT_PICK_ATTEMPTS = 3
+
+# Threads for Docker daemon round-trips (session validation at startup, container boot during create)
+SESSION_IO_WORKERS = 16
+
 class SessionManager:
     """Manages session-container pairs for isolated code execution environments"""
     
     def __init__(self, docker_image: str = "code-execution-env"):
-        self.docker_client = docker.from_env()
+        # Container objects reuse this client's API connection pool
+        self.docker_client = docker.from_env(max_pool_size=DOCKER_POOL_SIZE)
         self.docker_image = docker_image
+        self._network = self._ensure_network()
+        self.verbose = SESSION_MANAGER_VERBOSE
         self.sessions: Dict[str, Dict[str, Any]] = {}  # session_id -> {container_id, container_obj, created_at}
-        self.lock = threading.Lock()
+        # Guards self.sessions and port reservations only; Docker I/O happens outside it
+        self.lock = threading.RLock()
+        self._used_ports: Set[int] = set()  # host ports held by sessions, warm and booting containers
+        self._reload_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}  # container id -> (monotonic time, attrs)
         self.sessions_file = "sessions.json"
+        
+        # Mutations are appended to the journal; sessions.json is only rewritten on compaction.
+        # Other processes (e.g. the debug reloader) share both files, so appends and compaction take a file lock
+        # and compaction folds in what is on disk rather than this instance's view of it
+        self.journal_file = "sessions.log"
+        self._journal_file_lock_fd = open(self.journal_file + ".lock", 'ab')
+        self._persisted: Dict[str, Dict[str, Any]] = {}  # session_id -> serialized session, as on disk
+        self._journal_lock = threading.Lock()
+        self._journal_records = 0
+        self._user_latest: Dict[str, Tuple[str, float]] = {}  # email -> (most recent session_id, created_at)
+        self._sessions_by_user: Dict[str, Set[str]] = defaultdict(set)  # email -> all known session ids
+        self._age_heap: List[Tuple[float, str]] = []  # (created_at, session_id) min-heap for cleanup_inactive_sessions
+        self._claimed_sources: Set[str] = set()  # previous sessions a create_session is copying inputs from
+        self._closing = threading.Event()
+        self._io_pool = ThreadPoolExecutor(SESSION_IO_WORKERS, "session-io")
+        self._trash_queue: "queue.Queue[str]" = queue.Queue()
+        threading.Thread(target=self._empty_trash, name="session-janitor", daemon=True).start()
         self._load_sessions_from_file()
+        self._journal = open(self.journal_file, 'ab', buffering=0)
+        self._compact_journal()
+        threading.Thread(target=self._compact_periodically, name="session-journal", daemon=True).start()
+        
+        # Warm containers bind-mount per-slot dirs that are renamed to the session dirs at checkout.
+        # Containers and slots carry this instance's token; <token>.lock stays flocked while the owner lives
+        self._warm_token = uuid.uuid4().hex[:8]
+        self._warm_dir = os.path.join(WARM_SLOTS_BASE, self._warm_token)
+        self._warm_owner_fd = None
+        self._warm_pool: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=WARM_POOL_SIZE)
+        self._warm_refill = threading.Event()
+        if WARM_POOL_SIZE > 0:
+            os.makedirs(WARM_SLOTS_BASE, exist_ok=True)
+            # Lock before creating any slot so other instances never see our slots without a held lock
+            self._warm_owner_fd = open(os.path.join(WARM_SLOTS_BASE, f"{self._warm_token}.lock"), 'ab')
+            fcntl.flock(self._warm_owner_fd, fcntl.LOCK_EX)
+            threading.Thread(target=self._fill_warm_pool, name="warm-pool", daemon=True).start()
+        
+        atexit.register(self.close)
     
-    def _load_sessions_from_file(self):
-        """Load existing sessions from JSON file"""
-        if os.path.exists(self.sessions_file):
+    def close(self):
+        """Remove idle warm containers, compact the session journal and release pooled connections to the Docker daemon"""
+        self._closing.set()
+        self._warm_refill.set()
+        while True:
             try:
-                with open(self.sessions_file, 'r') as f:
-                    stored_sessions = json.load(f)
-                
-                # Validate and restore sessions
-                for session_id, session_data in stored_sessions.items():
-                    if self._validate_existing_session(session_id, session_data):
-                        self.sessions[session_id] = session_data
-                        # add_log(f"Restored session {session_id} from file")
-                    else:
-                        add_log(f"Session {session_id} from file is invalid, skipping")
-                        
+                warm = self._warm_pool.get_nowait()
+            except queue.Empty:
+                break
+            self._discard_warm_container(warm)
+        if self._warm_owner_fd:
+            shutil.rmtree(self._warm_dir, ignore_errors=True)
+            try:
+                os.remove(self._warm_owner_fd.name)
+            except OSError:
+                pass
+            self._warm_owner_fd.close()
+        # Nothing of ours to fold in otherwise, leave the files to whoever wrote them
+        if self._journal_records:
+            self._compact_journal()
+        with self._journal_lock:
+            self._journal.close()
+            self._journal_file_lock_fd.close()
+        self._io_pool.shutdown(wait=False)
+        try:
+            self.docker_client.close()
+        except Exception as e:
+            add_log(f"Error closing Docker client: {str(e)}")
+    
+    def _ensure_network(self) -> str:
+        """Create the shared session network once, falling back to the default bridge"""
+        try:
+            if not self.docker_client.networks.list(names=[SESSION_NETWORK]):
+                self.docker_client.networks.create(
+                    SESSION_NETWORK,
+                    driver='bridge',
+                    options={'com.docker.network.bridge.enable_icc': 'false'}
+                )
+            return SESSION_NETWORK
+        except Exception as e:
+            add_log(f"Error creating session network {SESSION_NETWORK}, using default bridge: {str(e)}")
+            return 'bridge'
+    
+    def _trash(self, path: str):
+        """Rename a directory out of the way and let the janitor thread delete it"""
+        trash_path = f"{path}{TRASH_MARKER}{uuid.uuid4().hex}"
+        os.rename(path, trash_path)
+        self._trash_queue.put(trash_path)
+    
+    def _empty_trash(self):
+        """Janitor loop deleting trashed directories, starting with any left by a previous process"""
+        for base in (INPUT_DATA_BASE, OUTPUT_DATA_BASE):
+            try:
+                with os.scandir(base) as entries:
+                    for entry in entries:
+                        if TRASH_MARKER in entry.name:
+                            self._trash_queue.put(entry.path)
+            except FileNotFoundError:
+                pass
+        
+        while True:
+            path = self._trash_queue.get()
+            shutil.rmtree(path, ignore_errors=True)
+    
+    def _warm_owner_alive(self, token: str) -> bool:
+        """Whether the SessionManager that created warm containers/slots under token still runs"""
+        if token == self._warm_token:
+            return True
+        try:
+            with open(os.path.join(WARM_SLOTS_BASE, f"{token}.lock"), 'rb') as f:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except FileNotFoundError:
+            return False
+        except BlockingIOError:
+            return True
+        return False
+    
+    def _reap_orphaned_warm_slots(self):
+        """Remove warm containers and slot dirs whose owning instance is gone, leaving live pools alone"""
+        try:
+            for container in self.docker_client.containers.list(all=True, filters={'name': 'session-warm-'}):
+                # session-warm-<token>-<slot>
+                token = container.name.split('-')[2]
+                if not self._warm_owner_alive(token):
+                    container.remove(force=True)
+            with os.scandir(WARM_SLOTS_BASE) as entries:
+                for entry in entries:
+                    if entry.is_dir() and not self._warm_owner_alive(entry.name):
+                        shutil.rmtree(entry.path, ignore_errors=True)
+                        try:
+                            os.remove(f"{entry.path}.lock")
+                        except FileNotFoundError:
+                            pass
+        except Exception as e:
+            add_log(f"Error removing stale warm containers: {str(e)}")
+    
+    def _fill_warm_pool(self):
+        """Background loop keeping WARM_POOL_SIZE idle containers ready for checkout"""
+        # Containers left over from a dead process have stale slot mounts
+        self._reap_orphaned_warm_slots()
+        
+        failures = 0
+        while not self._closing.is_set():
+            if self._warm_pool.full():
+                self._warm_refill.wait()
+                self._warm_refill.clear()
+                continue
+            try:
+                self._warm_pool.put_nowait(self._start_warm_container())
+                failures = 0
+            except Exception as e:
+                failures += 1
+                add_log(f"Error starting warm container ({failures}/{WARM_POOL_MAX_FAILURES}): {str(e)}")
+                if failures >= WARM_POOL_MAX_FAILURES:
+                    add_log("Warm container pool disabled after repeated failures")
+                    return
+                time.sleep(2 * failures)
+    
+    def _start_warm_container(self) -> Dict[str, Any]:
+        """Boot an idle container bound to a fresh pair of slot directories"""
+        slot = uuid.uuid4().hex
+        slot_input_dir = os.path.join(self._warm_dir, slot, 'input')
+        slot_output_dir = os.path.join(self._warm_dir, slot, 'output')
+        os.makedirs(slot_input_dir, exist_ok=True)
+        os.makedirs(slot_output_dir, exist_ok=True)
+        
+        with self.lock:
+            port = self._find_free_port()
+        try:
+            container = self._run_container(f"session-warm-{self._warm_token}-{slot[:8]}", slot_input_dir, slot_output_dir, port)
+        except Exception:
+            with self.lock:
+                self._used_ports.discard(port)
+            shutil.rmtree(os.path.join(self._warm_dir, slot), ignore_errors=True)
+            raise
+        return {
+            'container': container,
+            'port': port,
+            'slot_dir': os.path.join(self._warm_dir, slot),
+            'input_dir': slot_input_dir,
+            'output_dir': slot_output_dir
+        }
+    
+    def _checkout_warm_container(self) -> Optional[Dict[str, Any]]:
+        """Take a running container from the warm pool, or None if the pool is empty"""
+        while True:
+            try:
+                warm = self._warm_pool.get_nowait()
+            except queue.Empty:
+                return None
+            self._warm_refill.set()
+            try:
+                self._reload(warm['container'], force=True)
+                if warm['container'].status == 'running':
+                    return warm
             except Exception as e:
-                add_log(f"Error loading sessions from file: {str(e)}")
-                # If file is corrupted, start fresh
-                self.sessions = {}
+                add_log(f"Warm container check failed: {str(e)}")
+            self._discard_warm_container(warm)
     
-    def _save_sessions_to_file(self):
-        """Save current sessions to JSON file"""
+    def _discard_warm_container(self, warm: Dict[str, Any]):
+        """Remove an unused warm container and its slot directories"""
+        with self.lock:
+            self._used_ports.discard(warm['port'])
         try:
-            # Convert sessions to JSON-serializable format
-            sessions_to_save = {}
-            for session_id, session_info in self.sessions.items():
-                sessions_to_save[session_id] = {
-                    'container_id': session_info['container_id'],
-                    'created_at': session_info['created_at'],
-                    'status': session_info['status'],
-                    'container_ip': session_info.get('container_ip', ''),
-                    'container_port': session_info.get('container_port', ''),
-                    'output_dir': session_info.get('output_dir', ''),
-                    'user_info': session_info.get('user_info', {})
+            warm['container'].remove(force=True)
+            self._reload_cache.pop(warm['container'].id, None)
+        except Exception as e:
+            add_log(f"Error removing warm container: {str(e)}")
+        shutil.rmtree(warm['slot_dir'], ignore_errors=True)
+    
+    @staticmethod
+    def _has_session_mounts(container, session_id: str, output_dir: str) -> bool:
+        """Whether the container bind-mounts the session dirs by path
+        
+        A checked-out warm container mounts the slot paths its dirs were renamed from, so it keeps working
+        only until it is stopped: Docker resolves mount sources again on start, and the slot paths are gone.
+        """
+        sources = {os.path.abspath(mount.get('Source', '')) for mount in container.attrs.get('Mounts') or []}
+        return {os.path.abspath(os.path.join(INPUT_DATA_BASE, session_id)), os.path.abspath(output_dir)} <= sources
+    
+    def _replace_container(self, session_id: str, container, port: int, output_dir: str):
+        """Remove the session's container and run a new one mounting the session dirs on the same port"""
+        add_log(f"Recreating container {container.id[:12]} for session {session_id} on its session directories")
+        container.remove(force=True)
+        self._reload_cache.pop(container.id, None)
+        os.makedirs(output_dir, exist_ok=True)
+        return self._run_container(f"session-{session_id[:8]}", os.path.join(INPUT_DATA_BASE, session_id), output_dir, port)
+    
+    def _run_container(self, name: str, input_data_dir: str, session_output_dir: str, port: int):
+        """Start a code execution container with the given input/output mounts and host port"""
+        container = self.docker_client.containers.run(
+            self.docker_image,
+            detach=True,
+            name=name,
+            volumes={
+                # Mount session input directory (read-only)
+                input_data_dir: {
+                    'bind': '/app/execution_layer/input_data',
+                    'mode': 'ro'
+                },
+                # Mount session output directory (read-write) - jobs create subdirs here
+                session_output_dir: {
+                    'bind': '/app/execution_layer/output_data',
+                    'mode': 'rw'
                 }
-            
-            with open(self.sessions_file, 'w') as f:
-                json.dump(sessions_to_save, f, indent=2)
-                
+            },
+            ports={
+                '5001/tcp': port  # Map container port 5001 to host port
+            },
+            working_dir='/app',
+            mem_limit='1g',
+            cpu_count=1,
+            network=self._network,
+            remove=False,  # Keep container for debugging
+            tty=True,  # Allocate a pseudo-TTY
+            stdin_open=True,  # Keep STDIN open
+            extra_hosts={
+            'host.docker.internal': 'host-gateway'
+        }
+
+        )
+        
+        # Ensure container is running
+        self._reload(container)
+        if container.status != 'running':
+            add_log(f"Container {container.id[:12]} is not running, attempting to start...")
+            container.start()
+            self._reload(container, force=True)
+            if container.status != 'running':
+                raise Exception(f"Failed to start container {container.id[:12]}")
+        return container
+    
+    def _load_sessions_from_file(self):
+        """Load existing sessions from sessions.json and replay the journal on top of it"""
+        try:
+            with self._journal_file_lock():
+                self._persisted = self._read_journaled_state()
+        except Exception as e:
+            add_log(f"Error loading sessions from file: {str(e)}")
+            # If file is corrupted, start fresh
+            self._persisted = {}
+        
+        # Validate and restore sessions, one daemon round-trip chain per session in parallel
+        candidates = [(session_id, dict(session_data)) for session_id, session_data in self._persisted.items()]
+        results = self._io_pool.map(lambda item: self._validate_existing_session(*item), candidates)
+        invalid_sessions = []
+        for (session_id, session_data), valid in zip(candidates, results):
+            if valid:
+                with self.lock:
+                    self._add_session(session_id, session_data)
+                # add_log(f"Restored session {session_id} from file")
+            else:
+                invalid_sessions.append(session_id)
+        if invalid_sessions:
+            add_log(f"Skipping {len(invalid_sessions)} invalid sessions from file: {', '.join(invalid_sessions)}")
+        
+        # Index sessions per user so create_session does not scan input_data
+        for session_id, session_data in self._persisted.items():
+            self._index_user_session(session_id, session_data)
+    
+    @contextmanager
+    def _journal_file_lock(self):
+        """Hold the cross-process lock on sessions.json/sessions.log"""
+        fcntl.flock(self._journal_file_lock_fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._journal_file_lock_fd, fcntl.LOCK_UN)
+    
+    def _read_journaled_state(self) -> Dict[str, Dict[str, Any]]:
+        """sessions.json with sessions.log replayed on top of it (call with the journal file lock held)"""
+        persisted: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(self.sessions_file):
+            with open(self.sessions_file, 'rb') as f:
+                persisted = _json_loads(f.read())
+        
+        if os.path.exists(self.journal_file):
+            with open(self.journal_file, 'rb') as f:
+                for line in f:
+                    try:
+                        record = _json_loads(line)
+                    except ValueError:
+                        # Partial last line from an interrupted write
+                        continue
+                    if record.get('op') == 'upsert':
+                        persisted[record['id']] = record['data']
+                    elif record.get('op') == 'delete':
+                        persisted.pop(record['id'], None)
+        return persisted
+    
+    def _add_session(self, session_id: str, session_info: Dict[str, Any]):
+        """Insert a session and keep every secondary index in step (call with self.lock held)"""
+        self.sessions[session_id] = session_info
+        self._index_user_session(session_id, session_info)
+        heapq.heappush(self._age_heap, (session_info.get('created_at', 0), session_id))
+        if session_info.get('container_port'):
+            self._used_ports.add(session_info['container_port'])
+    
+    def _release_container(self, session_id: str, session_info: Dict[str, Any]):
+        """Release the host port held by a session's container (call with self.lock held)"""
+        self._used_ports.discard(session_info.get('container_port'))
+    
+    def _remove_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Remove a session from memory and release its port (call with self.lock held)"""
+        session_info = self.sessions.pop(session_id, None)
+        if session_info:
+            self._release_container(session_id, session_info)
+        return session_info
+    
+    def _index_user_session(self, session_id: str, session_info: Dict[str, Any]):
+        """Add session_id to its user's index, recording it as the latest if it is newer than the indexed one"""
+        email = self._email_key(session_info)
+        if not email:
+            return
+        self._sessions_by_user[email].add(session_id)
+        created_at = session_info.get('created_at', 0)
+        latest = self._user_latest.get(email)
+        if latest is None or created_at >= latest[1]:
+            self._user_latest[email] = (session_id, created_at)
+    
+    def _serialize_session(self, session_info: Dict[str, Any]) -> Dict[str, Any]:
+        """JSON-serializable view of a session"""
+        return {
+            'container_id': session_info['container_id'],
+            'created_at': session_info['created_at'],
+            'status': session_info['status'],
+            'container_ip': session_info.get('container_ip', ''),
+            'container_port': session_info.get('container_port', ''),
+            'output_dir': session_info.get('output_dir', ''),
+            'user_info': session_info.get('user_info', {})
+        }
+    
+    def _append_journal(self, record: Dict[str, Any]):
+        """Append one mutation record to the journal, compacting when it grows too long"""
+        try:
+            with self._journal_lock:
+                if record['op'] == 'upsert':
+                    self._persisted[record['id']] = record['data']
+                else:
+                    self._persisted.pop(record['id'], None)
+                with self._journal_file_lock():
+                    self._journal.write(_json_dumps(record) + b'\n')
+                self._journal_records += 1
+                compact = self._journal_records >= JOURNAL_COMPACT_RECORDS
+            if compact:
+                self._compact_journal()
+        except Exception as e:
+            add_log(f"Error writing session journal: {str(e)}")
+    
+    def _save_session(self, session_id: str):
+        """Persist the current state of one session"""
+        with self.lock:
+            session_info = self.sessions.get(session_id)
+            if session_info is None:
+                return
+            data = self._serialize_session(session_info)
+        self._append_journal({'op': 'upsert', 'id': session_id, 'data': data})
+    
+    def _delete_persisted_session(self, session_id: str):
+        """Remove a session from persistent storage"""
+        self._append_journal({'op': 'delete', 'id': session_id})
+    
+    def _compact_journal(self):
+        """Atomically rewrite sessions.json from the files on disk and truncate the journal"""
+        try:
+            with self._journal_lock, self._journal_file_lock():
+                if self._journal.closed:
+                    return
+                # Re-read rather than dump self._persisted, which misses records other processes appended
+                persisted = self._read_journaled_state()
+                tmp_file = self.sessions_file + '.tmp'
+                # Stream one session at a time rather than encoding the whole document into one buffer
+                with open(tmp_file, 'wb') as f:
+                    f.write(b'{')
+                    for i, (session_id, data) in enumerate(persisted.items()):
+                        if i:
+                            f.write(b',')
+                        f.write(_json_dumps({session_id: data})[1:-1])
+                    f.write(b'}')
+                os.replace(tmp_file, self.sessions_file)
+                self._journal.truncate(0)
+                self._persisted = persisted
+                self._journal_records = 0
         except Exception as e:
             add_log(f"Error saving sessions to file: {str(e)}")
     
+    def _compact_periodically(self):
+        """Fold the journal into sessions.json every JOURNAL_COMPACT_INTERVAL seconds"""
+        while not self._closing.wait(JOURNAL_COMPACT_INTERVAL):
+            if self._journal_records:
+                self._compact_journal()
+    
     def check_session_ownership(self, session_id: str, user_email: str) -> bool:
         """Check if a user owns a specific session"""
         with self.lock:
@@ -73,10 +522,17 @@ class SessionManager:
             if not session_info:
                 return False
             
-            session_user_info = session_info.get('user_info', {})
-            session_user_email = session_user_info.get('email', '').lower()
-            
-            return session_user_email == user_email.lower()
+            return self._email_key(session_info) == user_email.strip().lower()
+    
+    @staticmethod
+    def _email_key(session_info: Dict[str, Any]) -> str:
+        """Normalized owner email of a session"""
+        user_info = session_info.get('user_info') or {}
+        email_lower = user_info.get('email_lower')
+        if email_lower is None:
+            # Sessions persisted before email_lower existed
+            email_lower = user_info.get('email', '').strip().lower()
+        return email_lower
     
     def _validate_existing_session(self, session_id: str, session_data: Dict[str, Any]) -> bool:
         """Validate if an existing session from file is still valid"""
@@ -88,14 +544,16 @@ class SessionManager:
             # Try to get the container
             container = self.docker_client.containers.get(container_id)
             
+            # containers.get just inspected the container, so seed the cache instead of reloading
+            self._reload_cache[container.id] = (time.monotonic(), container.attrs)
+            
             # Check if container is running
-            container.reload()
             if container.status == 'running':
                 # Add container object to session data
                 session_data['container_obj'] = container
                 
                 # Get container IP address
-                container_ip = self._get_container_ip(container)
+                container_ip = self._get_container_ip(container, container.attrs)
                 if container_ip:
                     session_data['container_ip'] = container_ip
                     
@@ -103,13 +561,18 @@ class SessionManager:
             else:
                 # Try to start the container if it's stopped
                 add_log(f"Container {container_id[:12]} is {container.status}, attempting to start...")
-                container.start()
-                container.reload()
+                output_dir = session_data.get('output_dir', '')
+                if self._has_session_mounts(container, session_id, output_dir):
+                    container.start()
+                    self._reload(container, force=True)
+                else:
+                    container = self._replace_container(session_id, container, session_data['container_port'], output_dir)
+                    session_data['container_id'] = container.id
                 if container.status == 'running':
                     session_data['container_obj'] = container
                     
                     # Get container IP address
-                    container_ip = self._get_container_ip(container)
+                    container_ip = self._get_container_ip(container, container.attrs)
                     if container_ip:
                         session_data['container_ip'] = container_ip
                         
@@ -126,14 +589,26 @@ class SessionManager:
             add_log(f"Error validating session {session_id}: {str(e)}")
             return False
     
-    def _get_container_ip(self, container) -> str:
-        """Get container IP address"""
+    def _reload(self, container, force: bool = False):
+        """container.reload(), reusing attrs fetched within the last RELOAD_TTL_SECONDS"""
+        now = time.monotonic()
+        cached = self._reload_cache.get(container.id)
+        if not force and cached and now - cached[0] < RELOAD_TTL_SECONDS:
+            container.attrs = cached[1]
+            return
+        container.reload()
+        self._reload_cache[container.id] = (now, container.attrs)
+    
+    def _get_container_ip(self, container, cached_attrs: Optional[Dict[str, Any]] = None) -> str:
+        """Get container IP address, from cached_attrs when the caller has just inspected the container"""
         try:
-            container.reload()
-            if not container.attrs:
+            if cached_attrs is None:
+                self._reload(container)
+                cached_attrs = container.attrs
+            if not cached_attrs:
                 return ''
                 
-            network_settings = container.attrs.get('NetworkSettings', {})
+            network_settings = cached_attrs.get('NetworkSettings', {})
             if not network_settings:
                 return ''
                 
@@ -141,8 +616,8 @@ class SessionManager:
             if not networks:
                 return ''
                 
-            if 'bridge' in networks:
-                bridge_config = networks['bridge']
+            if self._network in networks:
+                bridge_config = networks[self._network]
                 if bridge_config and 'IPAddress' in bridge_config:
                     ip_address = bridge_config['IPAddress']
                     if ip_address:
@@ -163,90 +638,92 @@ class SessionManager:
     def create_session(self, user_info: Optional[Dict[str, Any]] = None) -> Tuple[str, str]:
         """Create a new session with associated Docker container"""
         session_id = str(uuid.uuid4())
+        port = None
         
-        with self.lock:
-            try:
-                add_log(f"Creating new session: {session_id}")
-                
-                # Find a free port for the container
-                port = self._find_free_port()
-                add_log(f"Using port {port} for container")
-
-                # Determine host paths for input and output directories inside execution_layer
-                base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))  # Points to backend/
-
-                # CORRECTED: Back to original session-based mounting
-                # Host input data directory (session-specific, read-only)
-                input_data_dir = os.path.join(base_dir, 'execution_layer', 'input_data', session_id)
+        try:
+            add_log(f"Creating new session: {session_id}")
+            
+            # CORRECTED: Back to original session-based mounting
+            # Host input data directory (session-specific, read-only)
+            input_data_dir = os.path.join(INPUT_DATA_BASE, session_id)
 
-                # Host output data directory (session-specific, read-write)
-                session_output_dir = os.path.join(base_dir, 'execution_layer', 'output_data', session_id)
+            # Host output data directory (session-specific, read-write)
+            session_output_dir = os.path.join(OUTPUT_DATA_BASE, session_id)
+            
+            # Prefer a warm container: its slot dirs become this session's dirs, the mounts follow the rename
+            # while it runs (a later restart recreates it, see _has_session_mounts)
+            warm = self._checkout_warm_container()
+            if warm:
+                port = warm['port']
+            else:
+                # Find a free port for the container, reserved in _used_ports so concurrent creates can't pick it
+                with self.lock:
+                    port = self._find_free_port()
+                add_log(f"Using port {port} for container")
+            
+            if warm:
+                os.makedirs(os.path.dirname(input_data_dir), exist_ok=True)
+                os.makedirs(os.path.dirname(session_output_dir), exist_ok=True)
+                os.rename(warm['input_dir'], input_data_dir)
+                os.rename(warm['output_dir'], session_output_dir)
+                shutil.rmtree(warm['slot_dir'], ignore_errors=True)
+                container = warm['container']
+                container.rename(f"session-{session_id[:8]}")
+                add_log(f"Checked out warm container {container.id[:12]} on port {port}")
+                container_future = self._io_pool.submit(lambda: (container, self._get_container_ip(container, container.attrs)))
+            else:
+                # The input dir must exist before the container mounts it so files copied below are visible
+                os.makedirs(input_data_dir, exist_ok=True)
                 os.makedirs(session_output_dir, exist_ok=True)
                 
+                # Create container with session-specific volume mounting (ORIGINAL DESIGN), booting while input files are copied
+                container_future = self._io_pool.submit(self._start_session_container, f"session-{session_id[:8]}", input_data_dir, session_output_dir, port)
+            
+            print(f"🔧 [SESSION MANAGER] Creating session {session_id}")
+            print(f"📥 Host input mount: {input_data_dir} -> /app/execution_layer/input_data")
+            print(f"📤 Host output mount: {session_output_dir} -> /app/execution_layer/output_data")
+            print(f"💡 Jobs will create subdirectories inside container output_data/")
+            
+            try:
+                # Claim the previous session under the lock so two creates for the same user don't both take it,
+                # then copy outside it so session lookups are not blocked on file I/O
+                with self.lock:
+                    most_recent_session = self._get_most_recent_session_with_files(user_info)
+                    if most_recent_session:
+                        self._claimed_sources.add(most_recent_session)
+                        # Active sessions survive the cleanup below and keep writing their inputs, so never share inodes with them
+                        allow_link = not self._has_running_container(most_recent_session)
+                
                 # Automatically copy files from the most recent session with files
-                most_recent_session = self._get_most_recent_session_with_files(user_info)
                 if most_recent_session:
-                    add_log(f"Auto-copying files from most recent session: {most_recent_session}")
-                    self._copy_session_input_files(most_recent_session, session_id, base_dir)
-                    
-                    # After successful copy, cleanup the previous session completely
-                    add_log(f"Cleaning up previous session after successful copy: {most_recent_session}")
-                    self._cleanup_previous_session(most_recent_session)
-                
-                print(f"🔧 [SESSION MANAGER] Creating session {session_id}")
-                print(f"📥 Host input mount: {input_data_dir} -> /app/execution_layer/input_data")
-                print(f"📤 Host output mount: {session_output_dir} -> /app/execution_layer/output_data")
-                print(f"💡 Jobs will create subdirectories inside container output_data/")
-                
-                # Create container with session-specific volume mounting (ORIGINAL DESIGN)
-                container = self.docker_client.containers.run(
-                    self.docker_image,
-                    detach=True,
-                    name=f"session-{session_id[:8]}",
-                    volumes={
-                        # Mount session input directory (read-only)
-                        input_data_dir: {
-                            'bind': '/app/execution_layer/input_data',
-                            'mode': 'ro'
-                        },
-                        # Mount session output directory (read-write) - jobs create subdirs here
-                        session_output_dir: {
-                            'bind': '/app/execution_layer/output_data',
-                            'mode': 'rw'
-                        }
-                    },
-                    ports={
-                        '5001/tcp': port  # Map container port 5001 to host port
-                    },
-                    working_dir='/app',
-                    mem_limit='1g',
-                    cpu_count=1,
-                    network_mode='bridge',
-                    remove=False,  # Keep container for debugging
-                    tty=True,  # Allocate a pseudo-TTY
-                    stdin_open=True,  # Keep STDIN open
-                    extra_hosts={
-                    'host.docker.internal': 'host-gateway'
-                }
-
-                )
-                
-                container_id = container.id
-                
-                # Ensure container is running
-                container.reload()
-                if container.status != 'running':
-                    add_log(f"Container {container_id[:12]} is not running, attempting to start...")
-                    container.start()
-                    container.reload()
-                    if container.status != 'running':
-                        raise Exception(f"Failed to start container {container_id[:12]}")
-                
-                # Get container IP address
-                container_ip = self._get_container_ip(container)
-                
-                # Store session information
-                self.sessions[session_id] = {
+                    try:
+                        add_log(f"Auto-copying files from most recent session: {most_recent_session}")
+                        self._copy_session_input_files(most_recent_session, session_id, allow_link=allow_link)
+                        
+                        # After successful copy, cleanup the previous session completely (index updates and renames only)
+                        add_log(f"Cleaning up previous session after successful copy: {most_recent_session}")
+                        with self.lock:
+                            self._cleanup_previous_session(most_recent_session)
+                    finally:
+                        with self.lock:
+                            self._claimed_sources.discard(most_recent_session)
+            except Exception:
+                # Don't leave an orphaned container behind
+                container_future.add_done_callback(lambda f: f.exception() is None and f.result()[0].remove(force=True))
+                raise
+            
+            # Wait for the container without holding the lock
+            container, container_ip = container_future.result()
+            container_id = container.id
+            
+            # Normalize the owner email once so ownership checks never lowercase per comparison
+            session_user_info = dict(user_info or {})
+            if session_user_info.get('email'):
+                session_user_info['email_lower'] = session_user_info['email'].strip().lower()
+            
+            # Store session information
+            with self.lock:
+                self._add_session(session_id, {
                     'container_id': container_id,
                     'container_obj': container,
                     'container_ip': container_ip,
@@ -254,49 +731,76 @@ class SessionManager:
                     'created_at': time.time(),
                     'status': 'active',
                     'output_dir': session_output_dir,
-                    'user_info': user_info or {}
-                }
-                
-                # Save sessions to file
-                self._save_sessions_to_file()
-                
-                add_log(f"Session {session_id} created with container {container_id[:12]} (status: {container.status}, IP: {container_ip}, Port: {port})")
-                # Cast to ensure we return a non-None string
-                return session_id, cast(str, container_id)
-                
-            except Exception as e:
-                add_log(f"Error creating session {session_id}: {str(e)}")
-                raise
+                    'user_info': session_user_info
+                })
+            
+            # Persist the new session
+            self._save_session(session_id)
+            
+            add_log(f"Session {session_id} created with container {container_id[:12]} (status: {container.status}, IP: {container_ip}, Port: {port})")
+            # Cast to ensure we return a non-None string
+            return session_id, cast(str, container_id)
+            
+        except Exception as e:
+            add_log(f"Error creating session {session_id}: {str(e)}")
+            with self.lock:
+                self._used_ports.discard(port)
+            raise
+    
+    def _start_session_container(self, name: str, input_data_dir: str, session_output_dir: str, port: int) -> Tuple[Any, str]:
+        """Start a session container and look up its IP address"""
+        container = self._run_container(name, input_data_dir, session_output_dir, port)
+        return container, self._get_container_ip(container, container.attrs)
     
     def _find_free_port(self) -> int:
-        """Find a free port on the host"""
-        import socket
+        """Let the kernel pick a free host port and reserve it in _used_ports (call with self.lock held)"""
+        for _ in range(PORT_PICK_ATTEMPTS):
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+                s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                s.bind(('', 0))
+                port = s.getsockname()[1]
+            # Reject ports already handed to a container that hasn't bound them yet
+            if port not in self._used_ports:
+                self._used_ports.add(port)
+                return port
         
-        # Start from port 5100
-        start_port = 5100
-        max_port = 5999
+        raise Exception(f"No free port found after {PORT_PICK_ATTEMPTS} attempts")
+    
+    @staticmethod
+    def _link_or_copy_file(source_file: str, target_file: str, allow_link: bool = False):
+        """Copy source_file to target_file with an in-kernel copy, falling back to shutil.copy2
         
-        for port in range(start_port, max_port + 1):
-            # Check if port is already used by another container
-            if any(session_info.get('container_port') == port for session_info in self.sessions.values()):
-                continue
-                
-            # Check if port is free on host
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                try:
-                    s.bind(('', port))
-                    return port
-                except OSError:
-                    continue
-                    
-        # If we get here, no ports were available
-        raise Exception(f"No free ports available in range {start_port}-{max_port}")
+        With allow_link the file is hardlinked instead. Only pass it when the source is about to be
+        deleted, since later in-place writes to either path would show up in both.
+        """
+        if allow_link:
+            try:
+                os.link(source_file, target_file)
+                return
+            except OSError:
+                pass
+        
+        try:
+            with open(source_file, 'rb') as src, open(target_file, 'wb') as dst:
+                remaining = os.fstat(src.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            if remaining == 0:
+                shutil.copystat(source_file, target_file)
+                return
+        except (OSError, AttributeError):
+            pass
+        
+        shutil.copy2(source_file, target_file)
     
-    def _copy_session_input_files(self, source_session_id: str, target_session_id: str, base_dir: str):
-        """Copy input files from source session to target session"""
+    def _copy_session_input_files(self, source_session_id: str, target_session_id: str, allow_link: bool = False):
+        """Copy input files from source session to target session, hardlinking them when allow_link is set"""
         try:
-            source_input_dir = os.path.join(base_dir, 'execution_layer', 'input_data', source_session_id)
-            target_input_dir = os.path.join(base_dir, 'execution_layer', 'input_data', target_session_id)
+            source_input_dir = os.path.join(INPUT_DATA_BASE, source_session_id)
+            target_input_dir = os.path.join(INPUT_DATA_BASE, target_session_id)
             
             # Check if source session input directory exists
             if not os.path.exists(source_input_dir):
@@ -308,14 +812,11 @@ class SessionManager:
             
             # Copy all files from source to target
             files_copied = 0
-            for filename in os.listdir(source_input_dir):
-                source_file = os.path.join(source_input_dir, filename)
-                target_file = os.path.join(target_input_dir, filename)
-                
-                if os.path.isfile(source_file):
-                    shutil.copy2(source_file, target_file)
-                    files_copied += 1
-                    add_log(f"Copied file: {filename} from session {source_session_id} to {target_session_id}")
+            with os.scandir(source_input_dir) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        self._link_or_copy_file(entry.path, os.path.join(target_input_dir, entry.name), allow_link)
+                        files_copied += 1
             
             add_log(f"Successfully copied {files_copied} files from session {source_session_id} to {target_session_id}")
             
@@ -323,6 +824,11 @@ class SessionManager:
             add_log(f"Error copying files from session {source_session_id} to {target_session_id}: {str(e)}")
             raise
     
+    def _has_running_container(self, session_id: str) -> bool:
+        """Whether the session is active with a container, which _cleanup_previous_session leaves alone"""
+        session_info = self.sessions.get(session_id)
+        return bool(session_info and session_info.get('status') == 'active' and session_info.get('container_obj'))
+    
     def _cleanup_previous_session(self, session_id: str):
         """Clean up previous session completely after successful data copy (removes from sessions.json and deletes files)"""
         try:
@@ -336,51 +842,42 @@ class SessionManager:
                 session_info = self.sessions[session_id]
                 
                 # Don't delete if session is currently active (has running container)
-                if session_info.get('status') == 'active' and session_info.get('container_obj'):
+                if self._has_running_container(session_id):
                     add_log(f"⚠️ Skipping cleanup - session {session_id} is currently active with running container")
                     return
             
-            # Also check persistent sessions.json file
-            persistent_session_info = None
-            if os.path.exists(self.sessions_file):
-                try:
-                    with open(self.sessions_file, 'r') as f:
-                        persistent_sessions = json.load(f)
-                        persistent_session_info = persistent_sessions.get(session_id)
-                except Exception as e:
-                    add_log(f"Error reading persistent sessions for cleanup: {str(e)}")
+            # Also check persisted sessions
+            persistent_session_info = self._persisted.get(session_id)
+            
+            # Drop the session from its user's index
+            email = self._email_key(session_info or persistent_session_info or {})
+            if email:
+                user_sessions = self._sessions_by_user.get(email)
+                if user_sessions is not None:
+                    user_sessions.discard(session_id)
+                    if not user_sessions:
+                        del self._sessions_by_user[email]
+                latest = self._user_latest.get(email)
+                if latest and latest[0] == session_id:
+                    del self._user_latest[email]
             
             # 1. Remove session from in-memory sessions
             if session_id in self.sessions:
-                del self.sessions[session_id]
+                self._remove_session(session_id)
                 add_log(f"✅ Removed session {session_id} from in-memory sessions")
             
-            # 2. Remove session from persistent sessions.json file
+            # 2. Remove session from persistent storage
             if persistent_session_info:
-                try:
-                    with open(self.sessions_file, 'r') as f:
-                        persistent_sessions = json.load(f)
-                    
-                    if session_id in persistent_sessions:
-                        del persistent_sessions[session_id]
-                        
-                        with open(self.sessions_file, 'w') as f:
-                            json.dump(persistent_sessions, f, indent=2)
-                        
-                        add_log(f"✅ Removed session {session_id} from persistent sessions.json")
-                    
-                except Exception as e:
-                    add_log(f"Error removing session from persistent file: {str(e)}")
+                self._delete_persisted_session(session_id)
+                add_log(f"✅ Removed session {session_id} from persistent sessions")
             
             # 3. Remove input directory and files (the old session's data)
-            base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-            input_dir = os.path.join(base_dir, 'execution_layer', 'input_data', session_id)
+            input_dir = os.path.join(INPUT_DATA_BASE, session_id)
             
             if os.path.exists(input_dir):
                 try:
-                    files_before = len(os.listdir(input_dir))
-                    shutil.rmtree(input_dir)
-                    add_log(f"✅ Deleted previous session input directory {input_dir} with {files_before} files")
+                    self._trash(input_dir)
+                    add_log(f"✅ Deleted previous session input directory {input_dir}")
                 except Exception as e:
                     add_log(f"Error deleting input directory {input_dir}: {str(e)}")
             else:
@@ -395,7 +892,7 @@ class SessionManager:
             
             if output_dir and os.path.exists(output_dir):
                 try:
-                    shutil.rmtree(output_dir)
+                    self._trash(output_dir)
                     add_log(f"✅ Deleted previous session output directory {output_dir}")
                 except Exception as e:
                     add_log(f"Error deleting output directory {output_dir}: {str(e)}")
@@ -406,11 +903,19 @@ class SessionManager:
             add_log(f"Error during previous session cleanup {session_id}: {str(e)}")
             # Don't raise - cleanup failure shouldn't stop new session creation
     
+    @staticmethod
+    def _dir_has_files(path: str) -> bool:
+        """Whether a directory contains at least one regular file, stopping at the first one found"""
+        try:
+            with os.scandir(path) as entries:
+                return any(entry.is_file() for entry in entries)
+        except (FileNotFoundError, NotADirectoryError):
+            return False
+    
     def _get_most_recent_session_with_files(self, current_user_info: Optional[Dict[str, Any]] = None) -> Optional[str]:
         """Get the most recent session that has input files, STRICTLY filtered by current user only"""
         try:
-            base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-            input_data_base = os.path.join(base_dir, 'execution_layer', 'input_data')
+            input_data_base = INPUT_DATA_BASE
             
             if not os.path.exists(input_data_base):
                 return None
@@ -420,62 +925,48 @@ class SessionManager:
                 add_log("No user info provided, skipping previous session data copy for security")
                 return None
             
-            current_user_email = current_user_info.get('email').lower()
+            current_user_email = current_user_info.get('email').strip().lower()
+            
+            # Fast path: the indexed latest session, as long as its input directory still has files
+            latest = self._user_latest.get(current_user_email)
+            if latest and latest[0] not in self._claimed_sources:
+                latest_dir = os.path.join(input_data_base, latest[0])
+                if self._dir_has_files(latest_dir):
+                    add_log(f"✅ Selected most recent user session: {latest[0]} for user: {current_user_email} (created: {latest[1]})")
+                    return latest[0]
+                add_log(f"Indexed session {latest[0]} has no input files, scanning all sessions")
+            
             user_sessions_with_files = []
             
-            # Load all session data from both memory and persistent file
-            all_session_data = {}
+            # Only this user's sessions are checked; other users' directories are never touched
+            user_session_ids = self._sessions_by_user.get(current_user_email, ())
+            scan_msgs = [f"Sessions to check for {current_user_email}: {len(user_session_ids)}"]
             
-            # First, load from persistent sessions.json file
-            if os.path.exists(self.sessions_file):
-                try:
-                    with open(self.sessions_file, 'r') as f:
-                        persistent_sessions = json.load(f)
-                        all_session_data.update(persistent_sessions)
-                        add_log(f"Loaded {len(persistent_sessions)} sessions from persistent file")
-                except Exception as e:
-                    add_log(f"Error reading persistent sessions file: {str(e)}")
-            
-            # Then, update with in-memory sessions (more recent)
-            for session_id, session_info in self.sessions.items():
-                if session_id not in all_session_data or session_info.get('created_at', 0) > all_session_data.get(session_id, {}).get('created_at', 0):
-                    all_session_data[session_id] = session_info
-            
-            add_log(f"Total sessions to check: {len(all_session_data)}")
-            
-            for session_dir in os.listdir(input_data_base):
-                session_path = os.path.join(input_data_base, session_dir)
-                if os.path.isdir(session_path):
-                    # Check if this directory has any files
-                    files = [f for f in os.listdir(session_path) if os.path.isfile(os.path.join(session_path, f))]
-                    if files:
-                        add_log(f"Session {session_dir} has {len(files)} files")
-                        
-                        # Get session info from combined data (persistent + memory)
-                        session_info = all_session_data.get(session_dir, {})
-                        
-                        if not session_info:
-                            add_log(f"No session info found for {session_dir} - skipping")
-                            continue
-                            
-                        session_user_info = session_info.get('user_info', {})
-                        session_user_email = session_user_info.get('email', '').lower()
-                        
-                        add_log(f"Session {session_dir}: user_email={session_user_email}, current_user={current_user_email}")
-                        
-                        # STRICT USER FILTER: Only include sessions from the SAME user
-                        if session_user_email == current_user_email:
-                            created_at = session_info.get('created_at', 0)
-                            user_sessions_with_files.append({
-                                'session_id': session_dir,
-                                'created_at': created_at,
-                                'user_email': session_user_email
-                            })
-                            add_log(f"✅ Found user session with files: {session_dir} (user: {session_user_email}, created: {created_at})")
-                        else:
-                            add_log(f"❌ Skipping session {session_dir} - belongs to different user: {session_user_email}")
-                    else:
-                        add_log(f"Session {session_dir} has no files - skipping")
+            for session_dir in list(user_session_ids):
+                # Another create is already copying from this one
+                if session_dir in self._claimed_sources:
+                    continue
+                
+                # Prefer the in-memory state over the persisted copy
+                session_info = self.sessions.get(session_dir) or self._persisted.get(session_dir)
+                if not session_info:
+                    scan_msgs.append(f"No session info found for {session_dir} - skipping")
+                    continue
+                
+                # Check if this directory has any files
+                if self._dir_has_files(os.path.join(input_data_base, session_dir)):
+                    created_at = session_info.get('created_at', 0)
+                    user_sessions_with_files.append({
+                        'session_id': session_dir,
+                        'created_at': created_at,
+                        'user_email': current_user_email
+                    })
+                    scan_msgs.append(f"✅ Found user session with files: {session_dir} (user: {current_user_email}, created: {created_at})")
+                else:
+                    scan_msgs.append(f"Session {session_dir} has no files - skipping")
+            
+            if __debug__ and self.verbose:
+                add_log('\n'.join(scan_msgs))
             
             if not user_sessions_with_files:
                 add_log(f"No previous sessions with files found for user: {current_user_email}")
@@ -496,27 +987,31 @@ class SessionManager:
         """Get container information for a session"""
         with self.lock:
             session_info = self.sessions.get(session_id)
-            if session_info and session_info['status'] == 'active':
-                # Check if container is still running
-                try:
-                    container = session_info['container_obj']
-                    container.reload()
-                    if container.status == 'running':
-                        # Make sure we have the IP address
-                        if not session_info.get('container_ip'):
-                            container_ip = self._get_container_ip(container)
-                            if container_ip:
-                                session_info['container_ip'] = container_ip
-                                self._save_sessions_to_file()
-                        return session_info
-                    else:
-                        add_log(f"Container for session {session_id} is not running: {container.status}")
-                        session_info['status'] = 'inactive'
-                        return None
-                except Exception as e:
-                    add_log(f"Error checking container status for session {session_id}: {str(e)}")
-                    session_info['status'] = 'error'
-                    return None
+            if not session_info or session_info['status'] != 'active':
+                return None
+            container = session_info['container_obj']
+        
+        # Check if container is still running (daemon round-trip, outside the lock)
+        try:
+            self._reload(container)
+            if container.status == 'running':
+                # Make sure we have the IP address
+                if not session_info.get('container_ip'):
+                    container_ip = self._get_container_ip(container, container.attrs)
+                    if container_ip:
+                        with self.lock:
+                            session_info['container_ip'] = container_ip
+                        self._save_session(session_id)
+                return session_info
+            else:
+                add_log(f"Container for session {session_id} is not running: {container.status}")
+                with self.lock:
+                    session_info['status'] = 'inactive'
+                return None
+        except Exception as e:
+            add_log(f"Error checking container status for session {session_id}: {str(e)}")
+            with self.lock:
+                session_info['status'] = 'error'
             return None
     
     def execute_in_container(self, session_id: str, command: str) -> Dict[str, Any]:
@@ -532,29 +1027,9 @@ class SessionManager:
         try:
             container = session_info['container_obj']
             
-            # Create a temporary Python file to execute the command
-            # This handles multi-line code better than -c flag
-            temp_file = f"/tmp/exec_{int(time.time() * 1000)}.py"
-            
-            # Write the command to a temporary file in the container
+            # Ship the code as an argv element: one exec round-trip, no temp file and no shell quoting
             exec_result = container.exec_run(
-                f"python -c \"with open('{temp_file}', 'w') as f: f.write('''{command}''')\"",
-                stdout=True,
-                stderr=True,
-                stream=False,
-                demux=True
-            )
-            
-            if exec_result.exit_code != 0:
-                return {
-                    'success': False,
-                    'error': f'Failed to create temporary file: {exec_result.output}',
-                    'output': ''
-                }
-            
-            # Execute the Python file
-            exec_result = container.exec_run(
-                f"python {temp_file}",
+                ['python', '-c', command],
                 stdout=True,
                 stderr=True,
                 stream=False,
@@ -565,9 +1040,6 @@ class SessionManager:
             stdout, stderr = exec_result.output
             exit_code = exec_result.exit_code
             
-            # Clean up temporary file
-            container.exec_run(f"rm -f {temp_file}")
-            
             # Decode output
             stdout_str = stdout.decode('utf-8') if stdout else ''
             stderr_str = stderr.decode('utf-8') if stderr else ''
@@ -597,46 +1069,50 @@ class SessionManager:
         """Clean up session container and ephemeral data (PRESERVES user input data)"""
         with self.lock:
             session_info = self.sessions.get(session_id)
-            if session_info:
-                try:
-                    # Stop and remove Docker container
-                    container = session_info['container_obj']
-                    container.stop(timeout=10)
-                    container.remove()
-                    add_log(f"Container for session {session_id} stopped and removed")
-                    
-                    # Mark session as inactive instead of deleting from memory
-                    self.sessions[session_id]['status'] = 'cleaned'
-                    self.sessions[session_id]['container_obj'] = None
-                    
-                    # Save updated sessions to file (preserves session history)
-                    self._save_sessions_to_file()
+        if session_info:
+            try:
+                # Stop and remove Docker container (outside the lock, stop can take seconds)
+                container = session_info['container_obj']
+                container.stop(timeout=10)
+                container.remove()
+                self._reload_cache.pop(container.id, None)
+                add_log(f"Container for session {session_id} stopped and removed")
+                
+                # Mark session as inactive instead of deleting from memory
+                with self.lock:
+                    session_info['status'] = 'cleaned'
+                    session_info['container_obj'] = None
+                    self._release_container(session_id, session_info)
+                
+                # Persist the updated session (preserves session history)
+                self._save_session(session_id)
 
-                    # ✅ SAFE: Only remove ephemeral output directory (job results)
-                    output_dir = session_info.get('output_dir')
-                    if output_dir and os.path.exists(output_dir):
-                        try:
-                            shutil.rmtree(output_dir)
-                            add_log(f"Removed ephemeral output directory: {output_dir}")
-                        except Exception as e:
-                            add_log(f"Error deleting output directory {output_dir}: {str(e)}")
+                # ✅ SAFE: Only remove ephemeral output directory (job results)
+                output_dir = session_info.get('output_dir')
+                if output_dir and os.path.exists(output_dir):
+                    try:
+                        self._trash(output_dir)
+                        add_log(f"Removed ephemeral output directory: {output_dir}")
+                    except Exception as e:
+                        add_log(f"Error deleting output directory {output_dir}: {str(e)}")
 
-                    # 🛡️ PRESERVE: NEVER delete input directory (contains user's persistent data)
-                    # Input directories contain user uploads and are needed for future sessions
-                    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-                    input_data_dir = os.path.join(base_dir, 'execution_layer', 'input_data', session_id)
-                    
-                    if os.path.exists(input_data_dir):
-                        files = os.listdir(input_data_dir)
-                        add_log(f"🛡️ PRESERVING input directory {input_data_dir} with {len(files)} files for future sessions")
-                    
-                    add_log(f"Session {session_id} cleaned up successfully (container removed, data preserved)")
-                    return True
-                    
-                except Exception as e:
-                    add_log(f"Error cleaning up session {session_id}: {str(e)}")
-                    return False
-            return False
+                # 🛡️ PRESERVE: NEVER delete input directory (contains user's persistent data)
+                # Input directories contain user uploads and are needed for future sessions
+                input_data_dir = os.path.join(INPUT_DATA_BASE, session_id)
+                
+                # The file count is only worth a directory walk when verbose logging is on
+                if self.verbose and os.path.exists(input_data_dir):
+                    with os.scandir(input_data_dir) as entries:
+                        file_count = sum(1 for _ in entries)
+                    add_log(f"🛡️ PRESERVING input directory {input_data_dir} with {file_count} files for future sessions")
+                
+                add_log(f"Session {session_id} cleaned up successfully (container removed, data preserved)")
+                return True
+                
+            except Exception as e:
+                add_log(f"Error cleaning up session {session_id}: {str(e)}")
+                return False
+        return False
     
     def cleanup_inactive_sessions(self, max_age_hours: int = 24):
         """Clean up sessions older than max_age_hours"""
@@ -644,14 +1120,17 @@ class SessionManager:
         max_age_seconds = max_age_hours * 3600
         
         with self.lock:
+            cutoff = current_time - max_age_seconds
             sessions_to_cleanup = []
-            for session_id, session_info in self.sessions.items():
-                if current_time - session_info['created_at'] > max_age_seconds:
+            while self._age_heap and self._age_heap[0][0] < cutoff:
+                created_at, session_id = heapq.heappop(self._age_heap)
+                session_info = self.sessions.get(session_id)
+                if session_info and session_info['created_at'] == created_at:
                     sessions_to_cleanup.append(session_id)
-            
-            for session_id in sessions_to_cleanup:
-                add_log(f"Cleaning up old session: {session_id}")
-                self.cleanup_session(session_id)
+        
+        for session_id in sessions_to_cleanup:
+            add_log(f"Cleaning up old session: {session_id}")
+            self.cleanup_session(session_id)
     
     def get_session_status(self, session_id: str) -> Dict[str, Any]:
         """Get status information for a session"""
@@ -678,16 +1157,24 @@ class SessionManager:
         if not session_info:
             return False
 
-       
-
         try:
-            import subprocess
-            subprocess.run(["docker", "restart", session_id])
-            # container = session_info['container_obj']
+            # Restart through the pooled SDK client rather than forking the docker CLI
+            container = session_info['container_obj']
+            self._reload(container)
+            if self._has_session_mounts(container, session_id, session_info['output_dir']):
+                container.restart(timeout=5)
+                self._reload(container, force=True)
+            else:
+                container = self._replace_container(session_id, container, session_info['container_port'], session_info['output_dir'])
+            
+            # The container may come back with a different address
+            container_ip = self._get_container_ip(container, container.attrs)
+            with self.lock:
+                session_info['container_id'] = container.id
+                session_info['container_obj'] = container
+                session_info['container_ip'] = container_ip
+            self._save_session(session_id)
             return True
         except Exception as e:
             print(f"Failed to restart session {session_id}: {e}")
             return False
-
-# Global session manager instance
-session_manager = SessionManager() 
\ No newline at end of file
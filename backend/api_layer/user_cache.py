@@ -0,0 +1,63 @@
+"""
+User Cache
+Short-lived cache of userCollection documents keyed by lowercased email
+
+The cache is per process and only the process that writes a user invalidates it,
+so other workers can serve a stale document for up to USER_CACHE_TTL_SECONDS
+(profile data) or AUTH_CACHE_MAX_AGE_SECONDS (authorization and role checks).
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+from cachetools import TTLCache
+
+USER_CACHE_MAX_SIZE = 10000
+USER_CACHE_TTL_SECONDS = 60
+# Authorization and role decisions only trust entries this fresh, bounding how long a
+# revoked or demoted user keeps access on workers that did not make the change
+AUTH_CACHE_MAX_AGE_SECONDS = 5
+
+# Cached (cached_at, user document) pairs; the document is None for emails known not to exist
+user_cache: TTLCache = TTLCache(maxsize=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+cache_lock = threading.Lock()
+
+# Returned by get_cached_user when the email has no cache entry
+MISSING = object()
+
+
+def cache_key(email: str) -> str:
+    """Normalize an email the same way user documents are keyed"""
+    return email.lower().strip()
+
+
+def get_cached_user(email: str, max_age: Optional[float] = None) -> Any:
+    """Cached user document for email, None if known not to exist, or MISSING if not cached
+    (or cached longer ago than max_age seconds)"""
+    with cache_lock:
+        entry = user_cache.get(cache_key(email))
+    if entry is None:
+        return MISSING
+    cached_at, user_data = entry
+    if max_age is not None and time.monotonic() - cached_at > max_age:
+        return MISSING
+    return user_data
+
+
+def set_cached_user(email: str, user_data: Optional[Dict[str, Any]]):
+    """Cache the result of a user document read"""
+    with cache_lock:
+        user_cache[cache_key(email)] = (time.monotonic(), user_data)
+
+
+def invalidate_user(email: str):
+    """Drop a user after their document was written or deleted"""
+    with cache_lock:
+        user_cache.pop(cache_key(email), None)
+
+
+def clear_user_cache():
+    """Drop every cached user"""
+    with cache_lock:
+        user_cache.clear()
+
@@ -5,24 +5,23 @@ from logger import add_log
 # Create user management blueprint
 user_bp = Blueprint('user', __name__, url_prefix='/users')
 
-def get_firebase_user_manager():
-    """Get Firebase user manager from current app"""
-    from flask import current_app
-    return current_app.firebase_user_manager
+@user_bp.record_once
+def bind_firebase_user_manager(state):
+    """Bind the app's Firebase user manager once at registration so routes skip the current_app proxy"""
+    user_bp.firebase_user_manager = state.app.firebase_user_manager
 
 @user_bp.route('/<string:email>', methods=['GET'])
 def get_user(email):
     """Get user information by email"""
     try:
-        firebase_user_manager = get_firebase_user_manager()
+        firebase_user_manager = user_bp.firebase_user_manager
         email = email.strip().lower()
         
-        # Check if email exists in Firestore
-        exists = firebase_user_manager.is_user_authorized(email)
-        user_data = None
-        
-        if exists:
-            user_data = firebase_user_manager.get_user_by_email(email)
+        # One document read answers both existence and authorization
+        user_data = firebase_user_manager.get_user_by_email(email)
+        exists = bool(user_data) and user_data.get('status', 'active') == 'active'
+        if not exists:
+            user_data = None
         
         response_data = {
             'email': email,
@@ -47,7 +46,7 @@ def get_user(email):
 def get_all_users():
     """Get all users (requires admin role)"""
     try:
-        firebase_user_manager = get_firebase_user_manager()
+        firebase_user_manager = user_bp.firebase_user_manager
         
         # Check if user has admin role
         user_info = g.get('user', {})
@@ -76,7 +75,7 @@ def get_all_users():
 def update_user_role(email):
     """Update user role (admin only)"""
     try:
-        firebase_user_manager = get_firebase_user_manager()
+        firebase_user_manager = user_bp.firebase_user_manager
         
         # Check if user has admin role
         user_info = g.get('user', {})
@@ -105,7 +104,8 @@ def update_user_role(email):
             }), 400
         
         # Check if user exists
-        if not firebase_user_manager.is_user_authorized(email):
+        user_data = firebase_user_manager.get_user_by_email(email)
+        if not user_data or user_data.get('status', 'active') != 'active':
             return jsonify({'error': 'User not found'}), 404
         
         # Update user role
@@ -130,7 +130,7 @@ def update_user_role(email):
 def get_current_user():
     """Get current user information"""
     try:
-        firebase_user_manager = get_firebase_user_manager()
+        firebase_user_manager = user_bp.firebase_user_manager
         
         # Get current user info
         user_info = g.get('user', {})
@@ -167,7 +167,7 @@ def get_current_user():
 def update_user_status(email):
     """Update user status (admin only)"""
     try:
-        firebase_user_manager = get_firebase_user_manager()
+        firebase_user_manager = user_bp.firebase_user_manager
         
         # Check if user has admin role
         user_info = g.get('user', {})
@@ -196,7 +196,8 @@ def update_user_status(email):
             }), 400
         
         # Check if user exists
-        if not firebase_user_manager.is_user_authorized(email):
+        user_data = firebase_user_manager.get_user_by_email(email)
+        if not user_data or user_data.get('status', 'active') != 'active':
             return jsonify({'error': 'User not found'}), 404
         
         # Update user status
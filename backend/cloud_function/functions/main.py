@@ -2,26 +2,56 @@
 # IMPORTS AND INITIALIZATION
 # ============================================================================
 
-from firebase_functions import https_fn
+from firebase_functions import https_fn, options
 from firebase_admin import initialize_app, storage
 import json
+import logging
+import orjson
+import os
 import requests
 import time
 import io
+import threading
+import functools
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from types import MappingProxyType
 from google.cloud import secretmanager
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Initialize Firebase Admin SDK
 initialize_app()
 
+# Diagnostics go through logging so messages below LOG_LEVEL are never formatted;
+# the poll loop and per-blob messages log at DEBUG
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper())
+log = logging.getLogger(__name__)
+
+# Shared HTTP session so login, job creation, polling and result download
+# reuse pooled keep-alive connections instead of a fresh TLS handshake each call.
+# Retry only covers idempotent methods, so a job creation POST is never replayed.
+_sf_session = requests.Session()
+_sf_session.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[500, 502, 503, 504]),
+))
+
 # ============================================================================
 # SECRET MANAGER UTILITIES
 # ============================================================================
 
+@functools.lru_cache(maxsize=1)
+def get_secret_manager_client():
+    # Created once per instance; building the gRPC channel costs more than the secret read
+    return secretmanager.SecretManagerServiceClient()
+
 def get_secret_from_secret_manager(secret_name):
     try:
-        # Initialize Secret Manager client
-        client = secretmanager.SecretManagerServiceClient()
+        # Reuse the instance-wide Secret Manager client
+        client = get_secret_manager_client()
                 
         # Access the secret version
         response = client.access_secret_version(request={"name": f"projects/insightbot-467305/secrets/{secret_name}/versions/latest"})
@@ -29,11 +59,11 @@ def get_secret_from_secret_manager(secret_name):
         # Decode the secret value
         secret_value = response.payload.data.decode("UTF-8")
         
-        print(f"Successfully retrieved secret: {secret_name}")
+        log.debug("Successfully retrieved secret: %s", secret_name)
         return secret_value.strip()
         
     except Exception as e:
-        print(f"Failed to retrieve secret {secret_name}: {str(e)}")
+        log.error("Failed to retrieve secret %s: %s", secret_name, e)
         return None
 
 def convert_email_to_secret_name(email):
@@ -44,11 +74,11 @@ def convert_email_to_secret_name(email):
         # Add _salesforce suffix
         secret_name = f"{secret_name}_salesforce"
         
-        print(f"Converted email '{email}' to secret name: '{secret_name}'")
+        log.debug("Converted email '%s' to secret name: '%s'", email, secret_name)
         return secret_name
         
     except Exception as e:
-        print(f"Error converting email to secret name: {str(e)}")
+        log.error("Error converting email to secret name: %s", e)
         return None
 
 def get_salesforce_credentials(user_email):
@@ -57,17 +87,15 @@ def get_salesforce_credentials(user_email):
         secret_name = convert_email_to_secret_name(user_email)
         
         if not secret_name:
-            print(f"Failed to convert email '{user_email}' to secret name")
+            log.error("Failed to convert email '%s' to secret name", user_email)
             return None
         
         credentials_json = get_secret_from_secret_manager(secret_name)
         
         if not credentials_json:
-            print(f"Failed to retrieve secret '{secret_name}' from Secret Manager")
+            log.error("Failed to retrieve secret '%s' from Secret Manager", secret_name)
             return None
         
-        print(f"Raw secret value: {credentials_json[:100]}...")  # Show first 100 chars for debugging
-        
         # Parse the JSON string to get credentials dictionary
         credentials = json.loads(credentials_json)
         
@@ -76,26 +104,42 @@ def get_salesforce_credentials(user_email):
         missing_fields = [field for field in required_fields if field not in credentials]
         
         if missing_fields:
-            print(f"Missing required fields: {missing_fields}")
+            log.error("Missing required fields: %s", missing_fields)
             return None
         
-        print("Successfully retrieved and parsed Salesforce credentials from Secret Manager")
+        log.debug("Successfully retrieved and parsed Salesforce credentials from Secret Manager")
         return credentials
         
     except json.JSONDecodeError as e:
         return None
     except Exception as e:
-        print(f"Error retrieving Salesforce credentials: {str(e)}")
+        log.error("Error retrieving Salesforce credentials: %s", e)
         return None
 
 # ============================================================================
 # SALESFORCE AUTHENTICATION
 # ============================================================================
 
-def login_to_salesforce(user_email):
-    # Salesforce OAuth 2.0 token endpoint
-    url = 'https://login.salesforce.com/services/oauth2/token'
+# Access tokens are reused across warm invocations, keyed by user email and a
+# fingerprint of the stored credentials so a re-saved secret forces a new login.
+# Salesforce does not return a lifetime for password-grant tokens and the session
+# timeout is set per org (15 minutes at the shortest), so stay under that floor.
+SF_TOKEN_TTL_SECONDS = 15 * 60
+SF_TOKEN_EXPIRY_MARGIN_SECONDS = 60
+_sf_token_cache = {}
+_sf_token_lock = threading.Lock()
+
+class SalesforceSessionExpired(Exception):
+    """Salesforce rejected an access token (HTTP 401)"""
+
+def evict_salesforce_token(user_email, access_token):
+    # Forget a cached token Salesforce has rejected so the next login fetches a new one
+    with _sf_token_lock:
+        for key in [key for key, cached in _sf_token_cache.items()
+                    if key[0] == user_email and cached["result"]["data"]["access_token"] == access_token]:
+            del _sf_token_cache[key]
 
+def login_to_salesforce(user_email):
     # Get credentials from Secret Manager
     credentials = get_salesforce_credentials(user_email)
     
@@ -106,6 +150,30 @@ def login_to_salesforce(user_email):
             "data": None,
         }
 
+    fingerprint = hashlib.sha256(json.dumps(credentials, sort_keys=True).encode("utf-8")).hexdigest()
+    cache_key = (user_email, fingerprint)
+    with _sf_token_lock:
+        cached = _sf_token_cache.get(cache_key)
+    if cached and time.time() < cached["expires_at"] - SF_TOKEN_EXPIRY_MARGIN_SECONDS:
+        log.info("Reusing cached Salesforce access token for %s", user_email)
+        return cached["result"]
+
+    result = request_salesforce_token(credentials)
+    if result["status"] == "success":
+        with _sf_token_lock:
+            # Drop tokens issued for this user's previous credentials
+            for key in [key for key in _sf_token_cache if key[0] == user_email]:
+                del _sf_token_cache[key]
+            _sf_token_cache[cache_key] = {
+                "result": result,
+                "expires_at": time.time() + SF_TOKEN_TTL_SECONDS,
+            }
+    return result
+
+def request_salesforce_token(credentials):
+    # Salesforce OAuth 2.0 token endpoint
+    url = 'https://login.salesforce.com/services/oauth2/token'
+
     # OAuth payload with credentials from Secret Manager
     payload = {
         'grant_type': 'password',  # Username-password flow
@@ -117,11 +185,11 @@ def login_to_salesforce(user_email):
 
     try:
         # Make authentication request to Salesforce
-        response = requests.post(url, data=payload, timeout=60)
+        response = _sf_session.post(url, data=payload, timeout=60)
 
         # Handle successful authentication
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             access_token = data['access_token']
             instance_url = data['instance_url']
                         
@@ -140,7 +208,7 @@ def login_to_salesforce(user_email):
             }
             
     except requests.RequestException as e:
-        print(f"Network error during authentication: {str(e)}")
+        log.error("Network error during authentication: %s", e)
         return {
             "status": "connection failed",
             "message": f"Network error: {str(e)}",
@@ -151,6 +219,13 @@ def login_to_salesforce(user_email):
 # SALESFORCE BULK API OPERATIONS
 # ============================================================================
 
+# Backoff between bulk job status polls: 0.5s growing 1.5x per quiet poll, capped at 10s
+POLL_INITIAL_DELAY_SECONDS = 0.5
+POLL_BACKOFF_FACTOR = 1.5
+POLL_MAX_DELAY_SECONDS = 10
+# Longest Retry-After honoured before polling again
+RETRY_AFTER_MAX_SECONDS = 60
+
 def create_bulk_query_job(soql_query, access_token, instance_url, api_version="v59.0"):
     # Construct the bulk API endpoint URL
     url = f"{instance_url}/services/data/{api_version}/jobs/query"
@@ -165,27 +240,45 @@ def create_bulk_query_job(soql_query, access_token, instance_url, api_version="v
     payload = {
         "operation": "query",  # Bulk query operation
         "query": soql_query,   # SOQL query to execute
+        "contentType": "CSV",  # Results format, parsed by the Arrow CSV reader
+        "columnDelimiter": "COMMA",
+        "lineEnding": "LF",
     }
     
     try:
         # Submit the job creation request
-        response = requests.post(url, headers=headers, json=payload, timeout=30)
+        response = _sf_session.post(url, headers=headers, json=payload, timeout=30)
         
         if response.status_code == 200:
-            job = response.json()
+            job = orjson.loads(response.content)
             job_id = job['id']
-            print(f"Bulk job created successfully: {job_id}")
+            log.info("Bulk job created successfully: %s", job_id)
             return job_id
+        elif response.status_code == 401:
+            # Session revoked or timed out; the caller evicts the token and logs in again
+            error_msg = f"Job creation failed: {response.status_code} - {response.text}"
+            log.warning("%s", error_msg)
+            raise SalesforceSessionExpired(error_msg)
         else:
             error_msg = f"Job creation failed: {response.status_code} - {response.text}"
-            print(f"{error_msg}")
+            log.error("%s", error_msg)
             raise Exception(error_msg)
             
     except requests.RequestException as e:
         error_msg = f"Network error during job creation: {str(e)}"
-        print(f"{error_msg}")
+        log.error("%s", error_msg)
         raise Exception(error_msg)
 
+def get_retry_after_seconds(response):
+    # Retry-After may be delta-seconds or an HTTP date; only the numeric form is used
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0, min(RETRY_AFTER_MAX_SECONDS, int(value)))
+    except ValueError:
+        return None
+
 def wait_for_job_completion(job_id, access_token, instance_url, api_version="v59.0"):
     # Construct the job status endpoint URL
     url = f"{instance_url}/services/data/{api_version}/jobs/query/{job_id}"
@@ -196,79 +289,163 @@ def wait_for_job_completion(job_id, access_token, instance_url, api_version="v59
         'Content-Type': 'application/json'
     }
     
-    print(f"Waiting for job {job_id} to complete...")
+    log.debug("Waiting for job %s to complete...", job_id)
+    
+    # Exponential backoff between polls, restarted whenever the job changes state
+    # and held while Salesforce reports more records processed
+    attempt = 0
+    last_state = None
+    last_processed = None
     
     # Poll until job completion
     while True:
         try:
             # Check job status
-            response = requests.get(url, headers=headers, timeout=30)
+            response = _sf_session.get(url, headers=headers, timeout=30)
+            retry_after = get_retry_after_seconds(response)
             
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
                 job_state = data['state']
                 
-                print(f"Job status: {job_state}")
+                log.debug("Job status: %s", job_state)
                 
                 # Check for completion
                 if job_state == 'JobComplete':
-                    print("Job completed successfully!")
+                    log.info("Bulk job %s completed", job_id)
                     return data
                 elif job_state in ['Failed', 'Aborted']:
                     error_msg = f"Job {job_state}: {data.get('stateMessage', 'Unknown error')}"
-                    print(f"{error_msg}")
+                    log.error("%s", error_msg)
                     raise Exception(error_msg)
                 
-                # Wait before next status check (5 seconds)
-                time.sleep(5)
+                processed = data.get('numberRecordsProcessed')
+                if job_state != last_state:
+                    attempt = 0
+                    last_state = job_state
+                elif processed is None or processed == last_processed:
+                    attempt += 1
+                last_processed = processed
+                
+                # Wait before next status check (0.5, 0.75, 1.1, ... then every 10 seconds)
+                delay = min(POLL_MAX_DELAY_SECONDS, POLL_INITIAL_DELAY_SECONDS * POLL_BACKOFF_FACTOR ** attempt)
+                time.sleep(retry_after if retry_after is not None else delay)
+            elif response.status_code in (429, 503) and retry_after is not None:
+                # Salesforce asked us to slow down - wait as long as it says and poll again
+                log.debug("Status check throttled, retrying in %ss", retry_after)
+                time.sleep(retry_after)
             else:
                 error_msg = f"Failed to check job status: {response.status_code} - {response.text}"
-                print(f"{error_msg}")
+                log.error("%s", error_msg)
                 raise Exception(error_msg)
                 
         except requests.RequestException as e:
             error_msg = f"Network error during status check: {str(e)}"
-            print(f"{error_msg}")
+            log.error("%s", error_msg)
             raise Exception(error_msg)
 
-def get_job_results(job_id, access_token, instance_url, api_version="v59.0"):
+def get_job_results(job_id, access_token, instance_url, api_version="v59.0", locator=None):
     # Construct the job results endpoint URL
     url = f"{instance_url}/services/data/{api_version}/jobs/query/{job_id}/results"
     
     # Set up authentication headers
     headers = {
         'Authorization': f'Bearer {access_token}',
-        'Content-Type': 'application/json'
+        'Accept': 'text/csv'
     }
     
+    # Later result pages are addressed by the Sforce-Locator of the previous page
+    params = {'locator': locator} if locator else None
+    
     try:
-        print(f"Downloading results for job {job_id}...")
+        log.debug("Downloading results for job %s (locator %s)...", job_id, locator)
         
-        # Download the results
-        response = requests.get(url, headers=headers, timeout=60)
+        # Stream the results so pandas parses the body as it arrives instead of
+        # holding a decoded copy of the whole CSV in memory first
+        response = _sf_session.get(url, headers=headers, params=params, timeout=60, stream=True)
         
         if response.status_code == 200:
-            csv_data = response.text
-            print(f"Results downloaded successfully ({len(csv_data)} characters)")
-            return csv_data
+            # Let urllib3 undo any gzip/deflate transfer encoding while streaming
+            response.raw.decode_content = True
+            log.debug("Results stream opened (%s bytes)", response.headers.get('Content-Length', 'unknown'))
+            return response
         else:
             error_msg = f"Failed to retrieve results: {response.status_code} - {response.text}"
-            print(f"{error_msg}")
+            response.close()
+            log.error("%s", error_msg)
             raise Exception(error_msg)
             
     except requests.RequestException as e:
         error_msg = f"Network error during result download: {str(e)}"
-        print(f"{error_msg}")
+        log.error("%s", error_msg)
         raise Exception(error_msg)
 
 # ============================================================================
 # MAIN DATA FETCHING FUNCTIONS
 # ============================================================================
 
-def fetch_salesforce_data(soql_query, access_token, instance_url, api_version="v59.0", bucket_name=None, object_name="salesforce_data", user_email=None):
+# pandas (and the numpy/pyarrow it pulls in) is imported on first use rather than
+# at module load, so cold starts and CORS preflights do not pay for it
+_pd = None
+
+def _pandas():
+    global _pd
+    if _pd is None:
+        import pandas as pd
+        _pd = pd
+    return _pd
+
+# Salesforce objects fetched concurrently per request
+FETCH_MAX_WORKERS = 8
+
+# Text columns with fewer distinct values than this share of rows become categoricals
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+def read_results_page(stream, column_types=MappingProxyType({})):
+    # pandas' engine='pyarrow' cannot turn on newlines_in_values, and Description,
+    # BillingStreet and ShippingStreet are multi-line text, so drive pyarrow directly
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+    table = pa_csv.read_csv(
+        stream,
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        # Empty text fields become NaN, as with pandas' own parser. Types are fixed up front
+        # because each page is parsed on its own and inference can disagree between pages
+        convert_options=pa_csv.ConvertOptions(
+            strings_can_be_null=True,
+            column_types={column: pa.type_for_alias(alias) for column, alias in column_types.items()},
+        ),
+    )
+    return table.to_pandas()
+
+def to_date_column(series):
+    # Keep only the calendar date as naive datetime64[ns], like the dates the backend expects
+    pd = _pandas()
+    if not pd.api.types.is_datetime64_any_dtype(series):
+        # Arrow leaves offset timestamps as text and plain dates as date objects; coerce bad values to NaT
+        series = pd.to_datetime(series, errors='coerce', utc=True)
+    if series.dt.tz is not None:
+        series = series.dt.tz_localize(None)
+    return series.dt.normalize().astype('datetime64[ns]')
+
+def downcast_dataframe(df):
+    # Shrink integer columns to the smallest int type that fits and store
+    # low-cardinality text as categories before the frame is serialized.
+    # Storage only: the backend widens these back when it converts the Parquet to a pickle.
+    # Floats stay float64: Amount/AnnualRevenue lose cents in float32.
+    pd = _pandas()
+    for column in df.select_dtypes('integer').columns:
+        df[column] = pd.to_numeric(df[column], downcast='integer')
+    row_count = len(df)
+    if row_count:
+        for column in df.select_dtypes('object').columns:
+            if df[column].nunique() / row_count < CATEGORY_MAX_UNIQUE_RATIO:
+                df[column] = df[column].astype('category')
+    return df
+
+def fetch_salesforce_data(soql_query, access_token, instance_url, api_version="v59.0", bucket_name=None, object_name="salesforce_data", user_email=None, date_columns=(), column_types=MappingProxyType({})):
     try:
-        print(f"Starting Salesforce data fetch...")
-        print(f"Query: {soql_query[:100]}{'...' if len(soql_query) > 100 else ''}")
+        log.info("Starting Salesforce data fetch: %.100s%s", soql_query, '...' if len(soql_query) > 100 else '')
         
         # Step 1: Create bulk query job
         job_id = create_bulk_query_job(soql_query, access_token, instance_url, api_version)
@@ -276,18 +453,24 @@ def fetch_salesforce_data(soql_query, access_token, instance_url, api_version="v
         # Step 2: Wait for job completion
         job_data = wait_for_job_completion(job_id, access_token, instance_url, api_version)
         
-        # Step 3: Download results
-        csv_data = get_job_results(job_id, access_token, instance_url, api_version)
-        
-        # Step 4: Convert CSV Data into DataFrame
-        import pandas as pd
-        df = pd.read_csv(io.StringIO(csv_data))
-        if 'CreatedDate' in df.columns:
-            df['CreatedDate'] = pd.to_datetime(df['CreatedDate'], errors='coerce').dt.date.astype('datetime64[ns]')
-        if 'CloseDate' in df.columns:
-            df['CloseDate'] = pd.to_datetime(df['CloseDate'], errors='coerce').dt.date.astype('datetime64[ns]')
+        # Step 3 + 4: Stream each results page straight into a DataFrame (pyarrow's
+        # multithreaded reader), following Sforce-Locator until Salesforce returns "null"
+        pd = _pandas()
+        frames = []
+        locator = None
+        while True:
+            response = get_job_results(job_id, access_token, instance_url, api_version, locator=locator)
+            with response:
+                locator = response.headers.get('Sforce-Locator')
+                frames.append(read_results_page(response.raw, column_types))
+            if not locator or locator == 'null':
+                break
+        df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+        for column in date_columns:
+            df[column] = to_date_column(df[column])
+        df = downcast_dataframe(df)
 
-        # Step 5: Save DataFrame to Firebase Storage as pickle file (if bucket_name provided)
+        # Step 5: Save DataFrame to Firebase Storage as Parquet file (if bucket_name provided)
         firebase_result = None
         delete_result = None
         if bucket_name:
@@ -295,71 +478,89 @@ def fetch_salesforce_data(soql_query, access_token, instance_url, api_version="v
             if user_email:
                 delete_result = delete_old_files_from_firebase_storage(bucket_name, user_email, object_name)
                 if delete_result["status"] == "success":
-                    print(f"Cleaned up {delete_result['deleted_count']} old files")
+                    log.debug("Cleaned up %s old files", delete_result['deleted_count'])
                 else:
-                    print(f"Warning: Failed to clean up old files: {delete_result.get('error', 'Unknown error')}")
+                    log.warning("Failed to clean up old files: %s", delete_result.get('error', 'Unknown error'))
             
             # Step 5b: Generate file path with user email and timestamp
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             if user_email:
                 # Sanitize user email for file path (replace @ with _ and remove special chars)
-                safe_email = user_email.replace('@', '_').replace('.', '_').replace('+', '_')
-                file_path = f"{safe_email}/data/salesforce/{object_name}_{timestamp}.pkl"
+                safe_email = _sanitize_email(user_email)
+                file_path = f"{safe_email}/data/salesforce/{object_name}_{timestamp}.parquet"
             else:
-                file_path = f"salesforce_data/{object_name}_{timestamp}.pkl"
+                file_path = f"salesforce_data/{object_name}_{timestamp}.parquet"
             
-            # Step 5c: Save DataFrame as pickle file to Firebase Storage
+            # Step 5c: Save DataFrame as Parquet file to Firebase Storage
             firebase_result = save_dataframe_to_firebase_storage(df, bucket_name, file_path)
             
             if firebase_result["status"] == "success":
-                print(f"Successfully saved DataFrame to Firebase Storage as pickle file")
+                log.debug("Successfully saved DataFrame to Firebase Storage as Parquet file")
             else:
-                print(f"Failed to save to Firebase Storage: {firebase_result.get('error', 'Unknown error')}")
+                log.error("Failed to save to Firebase Storage: %s", firebase_result.get('error', 'Unknown error'))
     
-        print(f"Successfully fetched DataFrame with {len(df)} records!")
+        record_count = len(df)
+        log.info("Successfully fetched DataFrame with %s records!", record_count)
         
         # Return DataFrame, Firebase Storage save result, and deletion result
         return {
             "dataframe": df,
             "firebase_save_result": firebase_result,
             "delete_result": delete_result,
-            "record_count": len(df)
+            "record_count": record_count
         }
         
     except Exception as e:
-        print(f"Data fetch failed: {str(e)}")
+        log.error("Data fetch failed: %s", e)
         raise
 
 # ============================================================================
 # FIREBASE STORAGE UTILITIES
 # ============================================================================
 
+# Characters in an email that are replaced with _ in Storage paths
+_SAFE_EMAIL_TBL = str.maketrans('@.+', '___')
+
+def _sanitize_email(email):
+    return email.translate(_SAFE_EMAIL_TBL)
+
+# Deletes sent per GCS batch request (the JSON API caps a batch at 100 calls)
+DELETE_BATCH_SIZE = 100
+
 def delete_old_files_from_firebase_storage(bucket_name, user_email, object_name):
     try:
         # Use explicit Firebase Storage bucket
         bucket = storage.bucket(bucket_name)
         
         # Sanitize user email for file path
-        safe_email = user_email.replace('@', '_').replace('.', '_').replace('+', '_')
+        safe_email = _sanitize_email(user_email)
         folder_path = f"{safe_email}/data/salesforce/"
         
-        print(f"Looking for old files in folder: {folder_path}")
+        log.debug("Looking for old files in folder: %s", folder_path)
         
-        # List all blobs in the user's folder
-        blobs = bucket.list_blobs(prefix=folder_path)
+        # Let GCS return only this object's exports (older uploads were pickles)
+        to_delete = list(bucket.list_blobs(match_glob=f"{folder_path}*{object_name}*.{{parquet,pkl}}"))
         
         deleted_files = []
-        for blob in blobs:
-            # Check if this blob is for the specific object
-            if blob.name.endswith('.pkl') and object_name in blob.name:
-                try:
-                    print(f"Deleting old file: {blob.name}")
-                    blob.delete()
-                    deleted_files.append(blob.name)
-                except Exception as e:
-                    print(f"Failed to delete {blob.name}: {e}")
-        
-        print(f"Deleted {len(deleted_files)} old files for {object_name}")
+        for start in range(0, len(to_delete), DELETE_BATCH_SIZE):
+            chunk = to_delete[start:start + DELETE_BATCH_SIZE]
+            try:
+                # One multipart request per chunk instead of a round trip per blob
+                with bucket.client.batch():
+                    for blob in chunk:
+                        log.debug("Deleting old file: %s", blob.name)
+                        blob.delete()
+                deleted_files.extend(blob.name for blob in chunk)
+            except Exception as e:
+                log.warning("Batch delete failed, deleting one by one: %s", e)
+                for blob in chunk:
+                    try:
+                        blob.delete()
+                        deleted_files.append(blob.name)
+                    except Exception as e:
+                        log.warning("Failed to delete %s: %s", blob.name, e)
+        
+        log.info("Deleted %s old files for %s", len(deleted_files), object_name)
         
         return {
             "status": "success",
@@ -369,7 +570,7 @@ def delete_old_files_from_firebase_storage(bucket_name, user_email, object_name)
         
     except Exception as e:
         error_msg = f"Failed to delete old files: {str(e)}"
-        print(error_msg)
+        log.error("%s", error_msg)
         return {
             "status": "error",
             "error": error_msg,
@@ -382,44 +583,33 @@ def save_dataframe_to_firebase_storage(dataframe, bucket_name, file_path):
         # Use explicit Firebase Storage bucket
         bucket = storage.bucket(bucket_name)
         
-        print(f"Using Firebase Storage bucket: {bucket.name}")
-        
         # Create blob object
         blob = bucket.blob(file_path)
         
-        # Serialize DataFrame to pickle format using pandas
-        import io as pandas_io
-        pickle_buffer = pandas_io.BytesIO()
-        dataframe.to_pickle(pickle_buffer)
-        pickle_data = pickle_buffer.getvalue()
+        # Serialize DataFrame to zstd-compressed, dictionary-encoded Parquet using pyarrow
+        # (repeated IDs, picklists and state codes collapse into the dictionary pages)
+        parquet_buffer = io.BytesIO()
+        dataframe.to_parquet(parquet_buffer, engine='pyarrow', compression='zstd', compression_level=3, use_dictionary=True, write_statistics=False)
+        file_size = parquet_buffer.tell()
         
-        # Upload to Firebase Storage
-        blob.upload_from_string(pickle_data, content_type='application/octet-stream')
+        # Upload to Firebase Storage straight from the buffer (no bytes copy); a known
+        # size below the resumable threshold goes up as a single multipart request
+        blob.upload_from_file(parquet_buffer, size=file_size, rewind=True, content_type='application/vnd.apache.parquet')
         
-        # Set public access (optional - you can remove this if you want private files)
-        blob.make_public()
-        
-        # Get public URL (no private key required)
-        public_url = blob.public_url
-        
-        print(f"DataFrame saved to Firebase Storage: gs://{bucket.name}/{file_path}")
-        print(f"DataFrame shape: {dataframe.shape}")
-        print(f"File size: {len(pickle_data)} bytes")
-        print(f"Public URL: {public_url}")
+        log.info("DataFrame %s saved to Firebase Storage: gs://%s/%s (%s bytes)", dataframe.shape, bucket.name, file_path, file_size)
         
         return {
             "status": "success",
             "bucket": bucket.name,
             "file_path": file_path,
-            "file_size": len(pickle_data),
+            "file_size": file_size,
             "dataframe_shape": dataframe.shape,
-            "firebase_url": f"gs://{bucket.name}/{file_path}",
-            "public_url": public_url
+            "firebase_url": f"gs://{bucket.name}/{file_path}"
         }
         
     except Exception as e:
         error_msg = f"Failed to save DataFrame to Firebase Storage: {str(e)}"
-        print(error_msg)
+        log.error("%s", error_msg)
         return {
             "status": "error",
             "error": error_msg,
@@ -427,11 +617,100 @@ def save_dataframe_to_firebase_storage(dataframe, bucket_name, file_path):
             "file_path": file_path
         }
 
+# ============================================================================
+# SALESFORCE OBJECT SCHEMA
+# ============================================================================
+
+# Hardcoded Salesforce objects to fetch
+SOBJECT_NAMES = ('Account', 'Opportunity')
+
+# Firebase Storage configuration - explicit bucket name
+FIREBASE_BUCKET_NAME = "insightbot-467305.firebasestorage.app"  # Your Firebase project's default bucket
+
+# Columns parsed as dates while reading the CSV (only where the object selects them)
+DATE_COLUMN_NAMES = ('CreatedDate', 'CloseDate')
+
+# Arrow types of the numeric and boolean columns; every other non-date column is read as text,
+# so values like AccountNumber or postal codes stay strings even on pages where all look numeric
+NON_TEXT_COLUMN_TYPES = MappingProxyType({
+    'AnnualRevenue': 'float64', 'Amount': 'float64', 'ExpectedRevenue': 'float64',
+    'Probability': 'float64', 'TotalOpportunityQuantity': 'float64',
+    'NumberOfEmployees': 'int64', 'NumberofLocations__c': 'int64',
+    'IsWon': 'bool',
+})
+
+# Hardcoded column mappings for each Salesforce object
+_OBJECT_COLUMNS = MappingProxyType({
+    'Account': (
+        "Account_Type__c", "AccountNumber", "AccountSource", "Active__c", "AnnualRevenue",
+        "BillingCity","BillingCountry","BillingCountryCode","BillingPostalCode","BillingState",
+        "BillingStateCode", "BillingStreet", "CleanStatus", "CreatedById", "CreatedDate", "CustomerPriority__c", 
+        "Description", "Id", "Industry", "Name","NumberOfEmployees","NumberofLocations__c","OperatingHoursId",
+        "ParentId","Rating","ShippingCity", "ShippingCountry","ShippingCountryCode","ShippingPostalCode", "ShippingState",
+        "ShippingStateCode","ShippingStreet","Site", "Type", "UpsellOpportunity__c", "YearStarted"
+        ),
+    'Opportunity': (
+        "AccountId", "Amount", "CampaignId", "CloseDate", "CreatedById", "CreatedDate",
+        "CurrentGenerators__c","DeliveryInstallationStatus__c","Description","ExpectedRevenue","ForecastCategoryName",
+        "Id","IsWon","LeadSource","MainCompetitors__c","Name","NextStep",
+        "OrderNumber__c","OwnerId","Pricebook2Id","Probability","StageName",
+        "TotalOpportunityQuantity", "TrackingNumber__c"
+        ),
+})
+
+# SOQL query and date columns per object, built once at import
+_SOQL = MappingProxyType({name: f"SELECT {', '.join(fields)} FROM {name}" for name, fields in _OBJECT_COLUMNS.items()})
+_DATE_COLUMNS = MappingProxyType({
+    name: tuple(column for column in DATE_COLUMN_NAMES if column in fields)
+    for name, fields in _OBJECT_COLUMNS.items()
+})
+_COLUMN_TYPES = MappingProxyType({
+    name: MappingProxyType({
+        column: NON_TEXT_COLUMN_TYPES.get(column, 'string')
+        for column in fields if column not in DATE_COLUMN_NAMES
+    })
+    for name, fields in _OBJECT_COLUMNS.items()
+})
+
+def fetch_salesforce_objects(sobject_names, access_token, instance_url, user_email):
+    # Start every object's bulk job at once; each one spends most of its
+    # time waiting on Salesforce, so they overlap on a small thread pool.
+    # Returns each object's fetch result, or the exception it raised, in request order
+    futures = {}
+    with ThreadPoolExecutor(max_workers=min(FETCH_MAX_WORKERS, len(sobject_names))) as executor:
+        for sobject_name in sobject_names:
+            # Use the SOQL query prebuilt from the hardcoded field names for this object
+            soql_query = _SOQL.get(sobject_name)
+            
+            if not soql_query:
+                log.info("No hardcoded fields found for %s - skipping", sobject_name)
+                continue
+            
+            # Fetch all data for this object using Bulk API
+            futures[sobject_name] = executor.submit(fetch_salesforce_data, soql_query, access_token, instance_url, bucket_name=FIREBASE_BUCKET_NAME, object_name=sobject_name, user_email=user_email, date_columns=_DATE_COLUMNS[sobject_name], column_types=_COLUMN_TYPES[sobject_name])
+    
+    outcomes = {}
+    for sobject_name, future in futures.items():
+        try:
+            outcomes[sobject_name] = future.result()
+        except Exception as e:
+            outcomes[sobject_name] = e
+    return outcomes
+
 # ============================================================================
 # CLOUD FUNCTION MAIN ENDPOINT
 # ============================================================================
 
-@https_fn.on_request()
+# Keep one instance warm and give the pandas/Parquet path room to work; concurrent
+# requests share the pooled HTTP session and the token cache (both thread-safe)
+@https_fn.on_request(
+    region="us-central1",
+    memory=options.MemoryOption.GB_2,
+    cpu=2,
+    min_instances=1,
+    concurrency=20,
+    timeout_sec=540,
+)
 def zingworks_salesforce_connector(req: https_fn.Request) -> https_fn.Response:
     try:        
         # ====================================================================
@@ -454,12 +733,6 @@ def zingworks_salesforce_connector(req: https_fn.Request) -> https_fn.Response:
             'Content-Type': 'application/json'
         }
         
-        # Hardcoded Salesforce objects to fetch
-        sobject_names = ['Account', 'Opportunity']
-        
-        # Firebase Storage configuration - explicit bucket name
-        FIREBASE_BUCKET_NAME = "insightbot-467305.firebasestorage.app"  # Your Firebase project's default bucket
-        
         # Extract user email from request body
         try:
             request_data = req.get_json() if req.method == 'POST' else {}
@@ -468,7 +741,7 @@ def zingworks_salesforce_connector(req: https_fn.Request) -> https_fn.Response:
             # Fallback for GET requests or missing username
             if not user_email:
                 return https_fn.Response(
-                    json.dumps({
+                    orjson.dumps({
                         "status": "error",
                         "message": "Username/email is required in request body. Send POST request with JSON body containing 'username', 'user_email', or 'email' field.",
                         "error_type": "MissingUsername"
@@ -477,11 +750,11 @@ def zingworks_salesforce_connector(req: https_fn.Request) -> https_fn.Response:
                     headers=headers
                 )
             else:
-                print(f"Processing request for user: {user_email}")
+                log.info("Processing request for user: %s", user_email)
             
         except Exception as e:
             return https_fn.Response(
-                json.dumps({
+                orjson.dumps({
                     "status": "error",
                     "message": f"Failed to parse request body: {str(e)}",
                     "error_type": "RequestParseError"
@@ -490,32 +763,13 @@ def zingworks_salesforce_connector(req: https_fn.Request) -> https_fn.Response:
                 headers=headers
             )
         
-        # Hardcoded column mappings for each Salesforce object
-        object_columns = {
-            'Account': [
-                "Account_Type__c", "AccountNumber", "AccountSource", "Active__c", "AnnualRevenue",
-                "BillingCity","BillingCountry","BillingCountryCode","BillingPostalCode","BillingState",
-                "BillingStateCode", "BillingStreet", "CleanStatus", "CreatedById", "CreatedDate", "CustomerPriority__c", 
-                "Description", "Id", "Industry", "Name","NumberOfEmployees","NumberofLocations__c","OperatingHoursId",
-                "ParentId","Rating","ShippingCity", "ShippingCountry","ShippingCountryCode","ShippingPostalCode", "ShippingState",
-                "ShippingStateCode","ShippingStreet","Site", "Type", "UpsellOpportunity__c", "YearStarted"
-                ],
-            'Opportunity': [
-                "AccountId", "Amount", "CampaignId", "CloseDate", "CreatedById", "CreatedDate",
-                "CurrentGenerators__c","DeliveryInstallationStatus__c","Description","ExpectedRevenue","ForecastCategoryName",
-                "Id","IsWon","LeadSource","MainCompetitors__c","Name","NextStep",
-                "OrderNumber__c","OwnerId","Pricebook2Id","Probability","StageName",
-                "TotalOpportunityQuantity", "TrackingNumber__c"
-                ]
-        }
-                
         # ====================================================================
         # STEP 1: AUTHENTICATE WITH SALESFORCE
         # ====================================================================
         auth_result = login_to_salesforce(user_email)
         
         if auth_result['status'] != 'success':
-            return https_fn.Response(json.dumps(auth_result), status=401, headers=headers)
+            return https_fn.Response(orjson.dumps(auth_result), status=401, headers=headers)
         
         # Extract credentials
         access_token = auth_result['data']['access_token']
@@ -529,38 +783,44 @@ def zingworks_salesforce_connector(req: https_fn.Request) -> https_fn.Response:
         total_records = 0
         successful_objects = 0
         
-        for i, sobject_name in enumerate(sobject_names, 1):
+        outcomes = fetch_salesforce_objects(SOBJECT_NAMES, access_token, instance_url, user_email)
+        
+        # A cached token can be revoked or time out before our TTL; drop it, log in
+        # again once and retry only the objects Salesforce turned away
+        expired = [name for name, outcome in outcomes.items() if isinstance(outcome, SalesforceSessionExpired)]
+        if expired:
+            log.warning("Salesforce rejected the access token for %s, logging in again", user_email)
+            evict_salesforce_token(user_email, access_token)
+            auth_result = login_to_salesforce(user_email)
+            if auth_result['status'] == 'success':
+                access_token = auth_result['data']['access_token']
+                instance_url = auth_result['data']['instance_url']
+                outcomes.update(fetch_salesforce_objects(expired, access_token, instance_url, user_email))
+        
+        # Collect in request order so the summary does not depend on which job finished first
+        for sobject_name, outcome in outcomes.items():
             try:
-                # Use hardcoded field names for this object
-                fields = object_columns.get(sobject_name, [])
-                
-                if not fields:
-                    print(f"No hardcoded fields found for {sobject_name} - skipping")
-                    continue
-
-                # Generate SOQL query with hardcoded field names
-                fields_str = ', '.join(fields)
-                soql_query = f"SELECT {fields_str} FROM {sobject_name}"
-                
-                # Fetch all data for this object using Bulk API
-                fetch_result = fetch_salesforce_data(soql_query, access_token, instance_url, bucket_name=FIREBASE_BUCKET_NAME, object_name=sobject_name, user_email=user_email)
+                if isinstance(outcome, Exception):
+                    raise outcome
+                fetch_result = outcome
                 df = fetch_result["dataframe"]
                 firebase_result = fetch_result["firebase_save_result"]
                 delete_result = fetch_result["delete_result"]
+                record_count = fetch_result["record_count"]
                 
-                if df is not None and len(df) > 0:
+                if df is not None and record_count > 0:
+                    saved = bool(firebase_result) and firebase_result.get("status") == "success"
                     results[sobject_name] = {
-                        "record_count": len(df),
-                        "dataframe_shape": df.shape,
-                        "firebase_pickle_file": firebase_result.get("firebase_url") if firebase_result and firebase_result.get("status") == "success" else None,
-                        "firebase_public_url": firebase_result.get("public_url") if firebase_result and firebase_result.get("status") == "success" else None,
-                        "firebase_file_size": firebase_result.get("file_size") if firebase_result and firebase_result.get("status") == "success" else None,
+                        "record_count": record_count,
+                        "dataframe_shape": (record_count, df.columns.size),
+                        "firebase_pickle_file": firebase_result.get("firebase_url") if saved else None,
+                        "firebase_file_size": firebase_result.get("file_size") if saved else None,
                         "firebase_save_status": firebase_result.get("status") if firebase_result else "not_attempted",
                         "deleted_old_files": delete_result.get("deleted_files", []) if delete_result else [],
                         "deleted_files_count": delete_result.get("deleted_count", 0) if delete_result else 0,
                         "status": "success"
                     }
-                    total_records += len(df)
+                    total_records += record_count
                     successful_objects += 1
                 else:
                     results[sobject_name] = {
@@ -583,14 +843,14 @@ def zingworks_salesforce_connector(req: https_fn.Request) -> https_fn.Response:
         # ====================================================================
         result = {
             "status": "success",
-            "message": f"One-go extraction complete: {successful_objects}/{len(sobject_names)} objects processed, {total_records} total records",
+            "message": f"One-go extraction complete: {successful_objects}/{len(SOBJECT_NAMES)} objects processed, {total_records} total records",
             "summary": {
-                "total_objects_requested": len(sobject_names),
+                "total_objects_requested": len(SOBJECT_NAMES),
                 "successful_objects": successful_objects,
                 "total_records_extracted": total_records
             },
         }
-        return https_fn.Response(json.dumps(result), headers=headers)
+        return https_fn.Response(orjson.dumps(result), headers=headers)
     
     # ========================================================================
     # GLOBAL ERROR HANDLER
@@ -604,7 +864,7 @@ def zingworks_salesforce_connector(req: https_fn.Request) -> https_fn.Response:
         }
         
         return https_fn.Response(
-            json.dumps(error_result),
+            orjson.dumps(error_result),
             status=500,
             headers={'Access-Control-Allow-Origin': '*', 'Content-Type': 'application/json'}
         )
@@ -613,7 +873,7 @@ def zingworks_salesforce_connector(req: https_fn.Request) -> https_fn.Response:
 
 # NOTE
 # 1. This function is used to fetch data from Salesforce and save it to Firebase Storage
-# 2. Data will store in the following path: {user_email}/data/salesforce/{object_name}_{timestamp}.pkl
+# 2. Data will store in the following path: {user_email}/data/salesforce/{object_name}_{timestamp}.parquet
 # 3. If data fetch again then previous one will delete and new one will be saved
 # TODO
 # 1. Apply an API key to use this function